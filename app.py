@@ -1,70 +1,69 @@
+import json
+import os
 from flask import Flask
-from flasgger import Swagger
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
-from config.config import Config
+from config.config import get_config
 from models import db
+from models.archival import init_archival
+from models.expiry import init_expiry
+from models.migrations import init_schema
+from models.pragmas import apply_sqlite_pragmas
 from routes import blueprints
-from models.location import Location
-from models.charger import Charger
+from routes.metrics_routes import metrics_bp
+from utils.metrics import init_metrics
+from utils.query_inspector import init_query_inspector
+from cli import register_commands
 
-app = Flask(__name__)
-swagger = Swagger(app)
-CORS(app)
-app.config.from_object(Config)
+def init_apidocs(app):
+    """
+    Registra o Swagger (flasgger) em /apidocs. O flasgger só é importado com
+    APIDOCS_ENABLED e, se APISPEC_FILE existir, a especificação pré-gerada por
+    `flask build-apispec` entra direto no cache do flasgger, dispensando o
+    processamento das docstrings de todas as rotas no primeiro acesso.
+    """
+    if not app.config.get("APIDOCS_ENABLED", True):
+        return None
+    from flasgger import Swagger
 
-db.init_app(app)
+    swagger = Swagger(app)
+    app.extensions["swagger"] = swagger
 
-locations_data = [
-    {"name": "Shopping Center", "address": "Av. Principal, 123"},
-    {"name": "Estação Central", "address": "Rua da Estação, 45"},
-    {"name": "Supermercado X", "address": "Av. Comercial, 789"},
-    {"name": "Bodytech", "address": "Av. Dom Hélder Câmara, 5474 - Cachambi, Rio de Janeiro - RJ, 20771-004"},
-    {"name": "Shopping Nova America", "address": "Av. Pastor Martin Luther King Jr., 126 - Del Castilho, Rio de Janeiro - RJ, 20765-000"},
-    {"name": "Super Mercados Guanabara", "address": "Rua da Estação. RJ, 45"},
-    {"name": "Supermercado A", "address": "Av. Comercial, 800"},
-    {"name": "Estacionamento x", "address": "Av. Dom Hélder Câmara, 0001 - Cachambi, Rio de Janeiro - RJ, 20371-004"},
-]
+    spec_file = app.config.get("APISPEC_FILE")
+    if spec_file and os.path.exists(spec_file):
+        with open(spec_file, encoding="utf-8") as f:
+            swagger.apispecs[Swagger.DEFAULT_ENDPOINT] = json.load(f)
+    return swagger
 
-chargers_data = [
-    {"location_id": 1, "status": "available"},
-    {"location_id": 2, "status": "unavailable"},
-    {"location_id": 3, "status": "maintenance"},
-    {"location_id": 4, "status": "available"},
-    {"location_id": 5, "status": "available"},
-    {"location_id": 6, "status": "available"},
-    {"location_id": 7, "status": "maintenance"},
-    {"location_id": 8, "status": "available"},
-]
+def create_app(config=None):
+    """ Cria a aplicação com o perfil `config` (nome ou classe; padrão: CHARGEHUB_CONFIG) """
+    app = Flask(__name__)
+    app.config.from_object(config if isinstance(config, type) else get_config(config))
+    if not app.config.get("SECRET_KEY"):
+        raise RuntimeError(f"Defina a variável de ambiente SECRET_KEY para o perfil {app.config['CONFIG_NAME']}")
+    CORS(app)
+    init_apidocs(app)
 
-def seed_database():
-    """ Insere os dados iniciais no banco apenas se ainda não existirem """
-    if not Location.query.first():
-        print("📌 Populando banco de dados com dados iniciais...")
-        
-        for loc in locations_data:
-            location = Location(**loc)
-            db.session.add(location)
-        
-        db.session.commit()
-
-        for charger in chargers_data:
-            charger_instance = Charger(**charger)
-            db.session.add(charger_instance)
-
-        db.session.commit()
+    db.init_app(app)
+    apply_sqlite_pragmas(app)
+    # Cria as tabelas que faltam e aplica as migrações pendentes (idempotente)
+    with app.app_context():
+        init_schema()
+    init_metrics(app)
+    init_query_inspector(app)
 
-        print("✅ Dados iniciais inseridos com sucesso!")
+    for bp in blueprints:
+        app.register_blueprint(bp, url_prefix='/api')
+    # /metrics fica na raiz, onde o Prometheus espera encontrá-lo
+    app.register_blueprint(metrics_bp)
 
-for bp in blueprints:
-    app.register_blueprint(bp, url_prefix='/api')
+    @app.route('/')
+    def home():
+        return "Olá, Flask!"
 
-@app.route('/')
-def home():
-    return "Olá, Flask!"
+    register_commands(app)
+    init_archival(app)
+    init_expiry(app)
+    return app
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-        seed_database()
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
@@ -0,0 +1,7 @@
+"""
+Benchmarks da API: gera uma massa de dados em um SQLite temporário, exercita
+todas as rotas pelo cliente de testes do Flask e por um gerador de carga HTTP
+com várias threads, e compara os resultados com um baseline em JSON.
+
+Uso: python -m benchmarks --help
+"""
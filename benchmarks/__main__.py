@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks das rotas da API")
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--chargers-per-location", type=int, default=4)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--appointments", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200, help="requisições medidas por cenário")
+    parser.add_argument("--warmup", type=int, default=10, help="requisições de aquecimento (modo client)")
+    parser.add_argument("--threads", type=int, default=8, help="clientes simultâneos no modo http")
+    parser.add_argument("--mode", choices=("client", "http", "both"), default="both")
+    parser.add_argument("--only", action="append", default=[],
+                        help="executa apenas cenários cujo nome começa com o prefixo (repetível)")
+    parser.add_argument("--config", help="perfil de configuração (padrão: CHARGEHUB_CONFIG ou default)")
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(__file__), "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="grava os resultados como novo baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="variação relativa de p95/vazão aceita antes de acusar regressão")
+    parser.add_argument("--output", help="grava os resultados desta execução em JSON")
+    parser.add_argument("--keep-db", action="store_true", help="mantém o banco temporário ao final")
+    return parser.parse_args(argv)
+
+
+def print_table(mode, results):
+    print(f"\n== {mode} ==")
+    print(f"{'cenário':32} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'SQL/req':>8} {'erros':>6}")
+    for name, r in results.items():
+        print(f"{name:32} {r['throughput_rps']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+              f"{r['p99_ms']:>9} {r['queries_per_request']:>8} {r['errors']:>6}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # A configuração lê DATABASE_URL na importação: definir antes de importá-la
+    workdir = tempfile.mkdtemp(prefix="chargehub-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # Os jobs em segundo plano alterariam a massa de dados durante as medições
+    os.environ["APPOINTMENT_EXPIRY_INTERVAL"] = "0"
+
+    from app import create_app
+    from . import dataset, runner
+    from .scenarios import SCENARIOS, Context
+
+    scenarios = [s for s in SCENARIOS if not args.only or any(s.name.startswith(p) for p in args.only)]
+    if not scenarios:
+        print("Nenhum cenário corresponde a --only", file=sys.stderr)
+        shutil.rmtree(workdir, ignore_errors=True)
+        return 2
+
+    app = create_app(args.config)
+    try:
+        print(f"📌 Gerando massa de dados em {workdir}...")
+        with app.app_context():
+            data = dataset.generate(
+                args.locations, args.chargers_per_location, args.users, args.appointments,
+                args.seed, app.config["PASSWORD_HASH_METHOD"],
+            )
+        ctx = Context(data, token=runner.login(app))
+
+        results = {}
+        if args.mode in ("client", "both"):
+            results["client"] = runner.run_client(app, ctx, scenarios, args.requests, args.warmup, args.seed)
+            print_table("client", results["client"])
+        if args.mode in ("http", "both"):
+            results["http"] = runner.run_http(app, ctx, scenarios, args.requests, args.threads, args.seed)
+            print_table("http", results["http"])
+
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "config": app.config.get("CONFIG_NAME"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "dataset": data.describe(),
+            "scenarios": [s.name for s in scenarios],
+            "requests": args.requests,
+            "threads": args.threads,
+            "results": results,
+        }
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+        status = 0
+        if os.path.exists(args.baseline) and not args.save_baseline:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+            # Consultas por requisição dependem dos caches aquecidos pelos cenários anteriores
+            if any(baseline.get(key) != report[key] for key in ("dataset", "scenarios", "requests")):
+                print("\n⚠️ O baseline foi gerado com outra massa de dados ou outros cenários; comparação ignorada")
+            else:
+                regressions = runner.compare(results, baseline["results"], args.tolerance)
+                if regressions:
+                    print("\n❌ Regressões em relação ao baseline:")
+                    for line in regressions:
+                        print(f"  - {line}")
+                    status = 1
+                else:
+                    print("\n✅ Sem regressões em relação ao baseline")
+        if args.save_baseline:
+            with open(args.baseline, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"\n💾 Baseline gravado em {args.baseline}")
+        return status
+    finally:
+        if args.keep_db:
+            print(f"Banco mantido em {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
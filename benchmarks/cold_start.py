@@ -0,0 +1,70 @@
+"""
+Mede o tempo de partida a frio: cada execução é um processo Python novo que
+importa o app, chama create_app() e atende a primeira requisição.
+
+Uso: python -m benchmarks.cold_start --runs 10 [--config production] [--path /api/chargers/]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado em cada processo filho; imprime os tempos de cada etapa em JSON
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app(sys.argv[1] or None)
+t2 = time.perf_counter()
+response = app.test_client().get(sys.argv[2])
+response.get_data()
+t3 = time.perf_counter()
+print(json.dumps({"status": response.status_code, "import": t1 - t0, "create_app": t2 - t1,
+                  "first_request": t3 - t2, "total": t3 - t0}))
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.cold_start", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--config", default="", help="perfil de configuração (padrão: CHARGEHUB_CONFIG ou default)")
+    parser.add_argument("--path", default="/api/chargers/", help="rota da primeira requisição")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="chargehub-cold-")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'cold.db')}", PYTHONPATH=ROOT)
+    if args.config:
+        env["CHARGEHUB_CONFIG"] = args.config
+    try:
+        subprocess.run([sys.executable, "-m", "flask", "--app", "app", "seed"],
+                       cwd=ROOT, env=env, check=True, capture_output=True)
+
+        samples = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", CHILD, args.config, args.path],
+                                 cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+            sample = json.loads(out.strip().splitlines()[-1])
+            sample["process"] = time.perf_counter() - started
+            samples.append(sample)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.runs} execuções, primeira requisição GET {args.path} (status {samples[-1]['status']})")
+    print(f"{'etapa':16} {'mediana ms':>11} {'mín ms':>9} {'máx ms':>9}")
+    for step in ("import", "create_app", "first_request", "total", "process"):
+        values = [s[step] * 1000 for s in samples]
+        print(f"{step:16} {statistics.median(values):>11.1f} {min(values):>9.1f} {max(values):>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+from models.synthetic import SYNTHETIC_PASSWORD, generate_dataset, location_name, user_email
+
+BENCH_PASSWORD = SYNTHETIC_PASSWORD
+
+
+class Dataset:
+    """ Tamanhos e referências da massa gerada, usados pelos cenários """
+
+    def __init__(self, locations, chargers_per_location, users, appointments, seed, base_time):
+        self.locations = locations
+        self.chargers_per_location = chargers_per_location
+        self.users = users
+        self.appointments = appointments
+        self.seed = seed
+        self.base_time = base_time
+
+    @property
+    def chargers(self):
+        return self.locations * self.chargers_per_location
+
+    location_name = staticmethod(location_name)
+    user_email = staticmethod(user_email)
+
+    def describe(self):
+        return {
+            "locations": self.locations,
+            "chargers_per_location": self.chargers_per_location,
+            "users": self.users,
+            "appointments": self.appointments,
+            "seed": self.seed,
+        }
+
+
+def generate(locations, chargers_per_location, users, appointments, seed, password_method):
+    """
+    Insere a massa de dados (ver models.synthetic) de forma determinística
+    para o `seed` informado. Deve ser chamada dentro de um app context, com o
+    banco vazio (o esquema é criado por create_app).
+    """
+    base_time, _ = generate_dataset(
+        locations, chargers_per_location, users, appointments, seed, password_method=password_method
+    )
+    return Dataset(locations, chargers_per_location, users, appointments, seed, base_time)
@@ -0,0 +1,178 @@
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event
+from werkzeug.serving import WSGIRequestHandler, make_server
+from models import db
+from .dataset import BENCH_PASSWORD, Dataset
+
+
+class QueryCounter:
+    """ Conta os comandos SQL executados pelo engine enquanto estiver ativo """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+    def take(self):
+        with self._lock:
+            count, self.count = self.count, 0
+        return count
+
+
+def percentile(sorted_values, p):
+    """ Percentil pelo método do posto mais próximo; `sorted_values` já ordenado """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, elapsed, queries, errors):
+    latencies = sorted(latencies)
+    n = len(latencies)
+    return {
+        "requests": n,
+        "errors": errors,
+        "throughput_rps": round(n / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "queries_per_request": round(queries / n, 2) if n else 0.0,
+    }
+
+
+def login(app):
+    """ Obtém um token do usuário 1 para os cenários autenticados """
+    response = app.test_client().post(
+        "/api/users/login", json={"email": Dataset.user_email(1), "password": BENCH_PASSWORD}
+    )
+    return response.get_json().get("token")
+
+
+def run_client(app, ctx, scenarios, requests, warmup, seed):
+    """ Executa cada cenário em sequência pelo cliente de testes do Flask """
+    client = app.test_client()
+    with app.app_context():
+        engine = db.engine
+
+    results = {}
+    with QueryCounter(engine) as counter:
+        for scenario in scenarios:
+            rng = random.Random(f"{seed}:{scenario.name}")
+            for _ in range(warmup):
+                path, body, headers = scenario.build(ctx, rng)
+                client.open(path, method=scenario.method, json=body, headers=headers).close()
+
+            latencies, errors = [], 0
+            counter.take()
+            started = time.perf_counter()
+            for _ in range(requests):
+                path, body, headers = scenario.build(ctx, rng)
+                t0 = time.perf_counter()
+                response = client.open(path, method=scenario.method, json=body, headers=headers)
+                response.get_data()
+                latencies.append(time.perf_counter() - t0)
+                if response.status_code not in scenario.expect:
+                    errors += 1
+                response.close()
+            elapsed = time.perf_counter() - started
+            results[scenario.name] = summarize(latencies, elapsed, counter.take(), errors)
+    return results
+
+
+def _http_call(base_url, scenario, ctx, rng):
+    path, body, headers = scenario.build(ctx, rng)
+    data = None
+    headers = dict(headers)
+    if body is not None:
+        data = json.dumps(body).encode()
+        headers["Content-Type"] = "application/json"
+    req = urllib.request.Request(base_url + path, data=data, headers=headers, method=scenario.method)
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    return time.perf_counter() - t0, status
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    """ Não registra cada requisição no terminal durante a medição """
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def run_http(app, ctx, scenarios, requests, threads, seed):
+    """
+    Sobe o app em um servidor WSGI com threads numa porta livre e dispara
+    `requests` requisições por cenário a partir de `threads` clientes simultâneos
+    """
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=_QuietRequestHandler)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    with app.app_context():
+        engine = db.engine
+
+    results = {}
+    try:
+        with QueryCounter(engine) as counter, ThreadPoolExecutor(max_workers=threads) as pool:
+            for scenario in scenarios:
+                # Um gerador por requisição mantém a sequência determinística entre threads
+                rngs = [random.Random(f"{seed}:{scenario.name}:{i}") for i in range(requests)]
+                counter.take()
+                started = time.perf_counter()
+                calls = list(pool.map(lambda rng: _http_call(base_url, scenario, ctx, rng), rngs))
+                elapsed = time.perf_counter() - started
+                errors = sum(1 for _, status in calls if status not in scenario.expect)
+                results[scenario.name] = summarize([t for t, _ in calls], elapsed, counter.take(), errors)
+    finally:
+        server.shutdown()
+        server_thread.join()
+    return results
+
+
+def compare(current, baseline, tolerance):
+    """
+    Lista as regressões em relação ao baseline: p95 maior ou vazão menor além
+    da tolerância relativa, ou qualquer aumento de consultas SQL por requisição
+    """
+    regressions = []
+    for mode, scenarios in current.items():
+        for name, now in scenarios.items():
+            before = baseline.get(mode, {}).get(name)
+            if before is None:
+                continue
+            if now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{mode}/{name}: p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+            if now["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{mode}/{name}: vazão {before['throughput_rps']} -> {now['throughput_rps']} req/s"
+                )
+            if now["queries_per_request"] > before["queries_per_request"]:
+                regressions.append(
+                    f"{mode}/{name}: consultas {before['queries_per_request']} -> {now['queries_per_request']} por requisição"
+                )
+    return regressions
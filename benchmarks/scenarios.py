@@ -0,0 +1,174 @@
+import itertools
+from datetime import datetime, timedelta
+from .dataset import BENCH_PASSWORD, Dataset
+
+# Agendamentos criados pelos cenários ficam depois de todo o histórico gerado
+FUTURE_OFFSET = timedelta(days=3650)
+
+
+class Scenario:
+    """
+    Uma requisição parametrizada. `build(ctx, rng)` retorna
+    (caminho, corpo JSON ou None, cabeçalhos); respostas com status fora de
+    `expect` contam como erro.
+    """
+
+    def __init__(self, name, method, build, expect=(200,)):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.expect = expect
+
+
+class Context:
+    """ Estado compartilhado entre os cenários de uma execução """
+
+    def __init__(self, dataset, token=None):
+        self.dataset = dataset
+        self.token = token
+        # itertools.count é seguro entre threads no CPython
+        self._serial = itertools.count(1)
+
+    def serial(self):
+        return next(self._serial)
+
+    def auth(self):
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+
+def _location(ctx, rng):
+    return rng.randint(1, ctx.dataset.locations)
+
+
+def _future_slot(ctx, hours=1):
+    start = ctx.dataset.base_time + FUTURE_OFFSET + timedelta(hours=ctx.serial() * hours)
+    return start.isoformat(), (start + timedelta(hours=hours)).isoformat()
+
+
+def _locations_with_chargers(ctx, rng):
+    return "/api/locations/locations_with_chargers", None, {}
+
+
+def _availability(ctx, rng):
+    # A parte futura das agendas começa hoje
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today + timedelta(days=rng.randint(0, 6))
+    return (f"/api/locations/{_location(ctx, rng)}/availability"
+            f"?from={start.isoformat()}&to={(start + timedelta(days=1)).isoformat()}"), None, {}
+
+
+def _nearby(ctx, rng):
+    lat, lon = rng.uniform(-23.0, -22.8), rng.uniform(-43.5, -43.2)
+    return f"/api/locations/nearby?lat={lat:.5f}&lon={lon:.5f}&radius=5&status=available", None, {}
+
+
+def _list_chargers(ctx, rng):
+    return "/api/chargers/?status=available&limit=100", None, {}
+
+
+def _list_chargers_by_location(ctx, rng):
+    return f"/api/chargers/?location_id={_location(ctx, rng)}", None, {}
+
+
+def _create_charger(ctx, rng):
+    return "/api/chargers/", {"location_id": _location(ctx, rng)}, {}
+
+
+def _bulk_chargers(ctx, rng):
+    return "/api/chargers/bulk", [{"location_id": _location(ctx, rng)} for _ in range(50)], {}
+
+
+def _patch_status(ctx, rng):
+    ids = rng.sample(range(1, ctx.dataset.chargers + 1), min(50, ctx.dataset.chargers))
+    return "/api/chargers/status", [
+        {"id": charger_id, "status": rng.choice(("available", "unavailable"))} for charger_id in ids
+    ], {}
+
+
+def _create_user(ctx, rng):
+    n = ctx.serial()
+    return "/api/users/", {
+        "name": f"Novo usuário {n}", "email": f"novo{n}-{ctx.dataset.seed}@bench.local", "password": BENCH_PASSWORD
+    }, {}
+
+
+def _login(ctx, rng):
+    return "/api/users/login", {
+        "email": Dataset.user_email(rng.randint(1, ctx.dataset.users)), "password": BENCH_PASSWORD
+    }, {}
+
+
+def _create_appointment(ctx, rng):
+    start, end = _future_slot(ctx)
+    return "/api/appointments/", {
+        "local": Dataset.location_name(_location(ctx, rng)),
+        "email": Dataset.user_email(rng.randint(1, ctx.dataset.users)),
+        "start_time": start,
+        "end_time": end,
+    }, {}
+
+
+def _batch_appointments(ctx, rng):
+    items = []
+    for _ in range(20):
+        start, end = _future_slot(ctx)
+        items.append({
+            "local": Dataset.location_name(_location(ctx, rng)),
+            "email": Dataset.user_email(rng.randint(1, ctx.dataset.users)),
+            "start_time": start,
+            "end_time": end,
+        })
+    return "/api/appointments/batch", items, {}
+
+
+def _user_appointments(ctx, rng):
+    return f"/api/appointments/{rng.randint(1, ctx.dataset.users)}?limit=50", None, {}
+
+
+def _own_appointments(ctx, rng):
+    # O token é do usuário 1 (ver runner.login)
+    return "/api/appointments/1?limit=50", None, ctx.auth()
+
+
+def _delete_appointment(ctx, rng):
+    return f"/api/appointments/{ctx.serial() % ctx.dataset.appointments + 1}", None, {}
+
+
+def _utilization(ctx, rng):
+    return f"/api/analytics/utilization?location_id={_location(ctx, rng)}", None, {}
+
+
+def _utilization_all(ctx, rng):
+    return "/api/analytics/utilization", None, {}
+
+
+def _diagnostics_db(ctx, rng):
+    return "/api/diagnostics/db", None, {}
+
+
+def _diagnostics_cache(ctx, rng):
+    return "/api/diagnostics/cache", None, {}
+
+
+# GET /api/chargers/stream (SSE) fica de fora: a conexão não termina
+SCENARIOS = [
+    Scenario("locations.with_chargers", "GET", _locations_with_chargers),
+    Scenario("locations.availability", "GET", _availability),
+    Scenario("locations.nearby", "GET", _nearby),
+    Scenario("chargers.list", "GET", _list_chargers),
+    Scenario("chargers.list_by_location", "GET", _list_chargers_by_location),
+    Scenario("chargers.create", "POST", _create_charger, expect=(201,)),
+    Scenario("chargers.bulk", "POST", _bulk_chargers, expect=(201,)),
+    Scenario("chargers.status", "PATCH", _patch_status),
+    Scenario("users.create", "POST", _create_user, expect=(201,)),
+    Scenario("users.login", "POST", _login),
+    Scenario("appointments.create", "POST", _create_appointment, expect=(201, 409)),
+    Scenario("appointments.batch", "POST", _batch_appointments, expect=(201, 207)),
+    Scenario("appointments.list", "GET", _user_appointments),
+    Scenario("appointments.list_with_token", "GET", _own_appointments),
+    Scenario("appointments.delete", "DELETE", _delete_appointment, expect=(200, 404)),
+    Scenario("analytics.utilization", "GET", _utilization),
+    Scenario("analytics.utilization_all", "GET", _utilization_all),
+    Scenario("diagnostics.db", "GET", _diagnostics_db),
+    Scenario("diagnostics.cache", "GET", _diagnostics_cache),
+]
@@ -0,0 +1,116 @@
+import click
+from models import db
+from models.archival import run_archival
+from models.migrations import init_schema
+from models.location import Location
+from models.charger import Charger
+from models.synthetic import DEFAULT_CHUNK_SIZE, SYNTHETIC_PASSWORD, generate_dataset
+from models.usage import rebuild_usage
+
+locations_data = [
+    {"name": "Shopping Center", "address": "Av. Principal, 123", "latitude": -22.9035, "longitude": -43.2096},
+    {"name": "Estação Central", "address": "Rua da Estação, 45", "latitude": -22.9042, "longitude": -43.1913},
+    {"name": "Supermercado X", "address": "Av. Comercial, 789", "latitude": -22.9110, "longitude": -43.2301},
+    {"name": "Bodytech", "address": "Av. Dom Hélder Câmara, 5474 - Cachambi, Rio de Janeiro - RJ, 20771-004", "latitude": -22.8876, "longitude": -43.2784},
+    {"name": "Shopping Nova America", "address": "Av. Pastor Martin Luther King Jr., 126 - Del Castilho, Rio de Janeiro - RJ, 20765-000", "latitude": -22.8794, "longitude": -43.2716},
+    {"name": "Super Mercados Guanabara", "address": "Rua da Estação. RJ, 45", "latitude": -22.8969, "longitude": -43.2870},
+    {"name": "Supermercado A", "address": "Av. Comercial, 800", "latitude": -22.9121, "longitude": -43.2315},
+    {"name": "Estacionamento x", "address": "Av. Dom Hélder Câmara, 0001 - Cachambi, Rio de Janeiro - RJ, 20371-004", "latitude": -22.8880, "longitude": -43.2775},
+]
+
+chargers_data = [
+    {"location_id": 1, "status": "available"},
+    {"location_id": 2, "status": "unavailable"},
+    {"location_id": 3, "status": "maintenance"},
+    {"location_id": 4, "status": "available"},
+    {"location_id": 5, "status": "available"},
+    {"location_id": 6, "status": "available"},
+    {"location_id": 7, "status": "maintenance"},
+    {"location_id": 8, "status": "available"},
+]
+
+def seed_database():
+    """ Insere os dados iniciais no banco apenas se ainda não existirem """
+    if not Location.query.first():
+        print("📌 Populando banco de dados com dados iniciais...")
+        
+        for loc in locations_data:
+            location = Location(**loc)
+            db.session.add(location)
+        
+        db.session.commit()
+
+        for charger in chargers_data:
+            charger_instance = Charger(**charger)
+            db.session.add(charger_instance)
+
+        db.session.commit()
+
+        print("✅ Dados iniciais inseridos com sucesso!")
+
+def register_commands(app):
+    """ Registra os comandos `flask init-db`, `flask seed`, `flask archive-appointments`, `flask rebuild-usage` e `flask build-apispec` """
+
+    @app.cli.command("init-db")
+    def init_db_command():
+        """ Cria as tabelas e aplica as migrações pendentes (também feito por create_app) """
+        init_schema()
+
+    @app.cli.command("seed")
+    @click.option("--locations", type=click.IntRange(min=0), default=0,
+                  help="Localizações sintéticas; sem esta opção, insere os dados de demonstração")
+    @click.option("--chargers-per-location", type=click.IntRange(min=0), default=4, show_default=True)
+    @click.option("--users", type=click.IntRange(min=0), default=0)
+    @click.option("--appointments", type=click.IntRange(min=0), default=0)
+    @click.option("--seed", "random_seed", type=int, default=42, show_default=True,
+                  help="Semente do gerador; a mesma semente produz os mesmos dados")
+    @click.option("--chunk-size", type=click.IntRange(min=1), default=DEFAULT_CHUNK_SIZE, show_default=True,
+                  help="Linhas por transação")
+    def seed_command(locations, chargers_per_location, users, appointments, random_seed, chunk_size):
+        """ Insere os dados iniciais ou uma massa sintética (o esquema é criado por create_app) """
+        if not (locations or users or appointments):
+            seed_database()
+            return
+
+        try:
+            generate_dataset(
+                locations, chargers_per_location, users, appointments, random_seed,
+                password_method=app.config["PASSWORD_HASH_METHOD"], chunk_size=chunk_size,
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        print(f"🔑 Senha dos usuários sintéticos: {SYNTHETIC_PASSWORD}")
+
+    @app.cli.command("archive-appointments")
+    @click.option("--older-than-days", type=click.IntRange(min=0),
+                  help="Idade mínima, em dias, do fim do agendamento (padrão: APPOINTMENT_ARCHIVE_AFTER_DAYS)")
+    @click.option("--batch-size", type=click.IntRange(min=1),
+                  help="Linhas por transação (padrão: APPOINTMENT_ARCHIVE_BATCH_SIZE)")
+    @click.option("--max-batches", type=click.IntRange(min=1), help="Interrompe após N lotes")
+    def archive_appointments_command(older_than_days, batch_size, max_batches):
+        """ Move agendamentos finalizados antigos para appointment_archive """
+        moved = run_archival(app, older_than_days, batch_size, max_batches)
+        print(f"✅ {moved} agendamentos arquivados")
+
+    @app.cli.command("rebuild-usage")
+    def rebuild_usage_command():
+        """ Recalcula o rollup charger_usage_hourly a partir dos agendamentos """
+        with db.engine.begin() as conn:
+            rebuild_usage(conn)
+        print("✅ Rollup de ocupação recalculado")
+
+    @app.cli.command("build-apispec")
+    @click.option("--output", "-o", help="Arquivo de saída (padrão: APISPEC_FILE ou apispec.json)")
+    def build_apispec_command(output):
+        """ Gera a especificação OpenAPI a partir das docstrings das rotas """
+        swagger = app.extensions.get("swagger")
+        if swagger is None:
+            raise click.ClickException("A documentação está desativada (APIDOCS_ENABLED)")
+        # Descarta a especificação carregada do arquivo para processar as docstrings atuais
+        swagger.apispecs.clear()
+        spec = swagger.get_apispecs()
+        output = output or app.config.get("APISPEC_FILE") or "apispec.json"
+        # O provedor JSON do Flask serializa as datas dos exemplos como o /apispec_1.json faz
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(app.json.dumps(spec, ensure_ascii=False, indent=2))
+        print(f"✅ Especificação com {len(spec.get('paths', {}))} rotas gravada em {output}")
@@ -1,8 +1,120 @@
 import os
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-DATABASE_URI = f"sqlite:///{os.path.join(BASE_DIR, '../database.db')}"
+# DATABASE_URL permite apontar para outro banco (ex.: o arquivo temporário dos benchmarks)
+DATABASE_URI = os.environ.get("DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, '../database.db')}")
 
 class Config:
+    CONFIG_NAME = "default"
     SQLALCHEMY_DATABASE_URI = DATABASE_URI
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Chave usada para assinar os tokens de sessão. O padrão conhecido só vale
+    # fora de produção; o perfil production exige a variável SECRET_KEY
+    SECRET_KEY = os.environ.get("SECRET_KEY", "chargehub-dev-secret")
+    # Validade, em segundos, do token emitido no login
+    AUTH_TOKEN_MAX_AGE = 3600
+    # Método e custo do hash de senha, na forma completa do werkzeug
+    # (ex.: "scrypt:32768:8:1" ou "pbkdf2:sha256:600000"). Hashes gravados com
+    # outros parâmetros são refeitos no próximo login bem-sucedido
+    PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+    # Pool de processos para hash de senha (0 = na thread da requisição).
+    # Acima de PASSWORD_HASH_MAX_PENDING operações simultâneas a API responde
+    # 503 com Retry-After em vez de enfileirar
+    PASSWORD_HASH_WORKERS = 2
+    PASSWORD_HASH_MAX_PENDING = 16
+    PASSWORD_HASH_TIMEOUT = 10
+    PASSWORD_HASH_RETRY_AFTER = 1
+
+    # Arquivamento de agendamentos finalizados (ver models/archival.py): move
+    # para appointment_archive os que terminaram há mais de
+    # APPOINTMENT_ARCHIVE_AFTER_DAYS dias, em lotes, a cada
+    # APPOINTMENT_ARCHIVE_INTERVAL segundos (0 = apenas via `flask archive-appointments`)
+    APPOINTMENT_ARCHIVE_INTERVAL = 0
+    APPOINTMENT_ARCHIVE_AFTER_DAYS = 30
+    APPOINTMENT_ARCHIVE_BATCH_SIZE = 1000
+
+    # Conclusão automática (ver models/expiry.py): a cada
+    # APPOINTMENT_EXPIRY_INTERVAL segundos os agendamentos 'confirmed' já
+    # encerrados passam a 'done', em lotes de APPOINTMENT_EXPIRY_BATCH_SIZE (0 = desligado, o padrão)
+    APPOINTMENT_EXPIRY_INTERVAL = int(os.environ.get("APPOINTMENT_EXPIRY_INTERVAL", 0))
+    APPOINTMENT_EXPIRY_BATCH_SIZE = 1000
+
+    # Instrumentação por requisição (ver utils/metrics.py): histogramas em /metrics
+    # e, opcionalmente, o cabeçalho Server-Timing em cada resposta
+    METRICS_ENABLED = True
+    METRICS_SERVER_TIMING = True
+
+    # Inspeção opcional do SQL de cada requisição (ver utils/query_inspector.py):
+    # avisa (ou lança RepeatedQueryError) quando a mesma forma de comando roda
+    # mais de QUERY_REPEAT_THRESHOLD vezes e grava os comandos acima de
+    # SLOW_QUERY_MS, com o EXPLAIN QUERY PLAN, no logger "chargehub.slow_queries"
+    # (e no arquivo SLOW_QUERY_LOG, se definido)
+    QUERY_INSPECTION = os.environ.get("QUERY_INSPECTION") == "1"
+    QUERY_REPEAT_THRESHOLD = 10
+    QUERY_REPEAT_RAISE = False
+    SLOW_QUERY_MS = 100
+    SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG")
+
+    # Documentação Swagger em /apidocs. Com APISPEC_FILE, a especificação gerada
+    # por `flask build-apispec` é carregada no lugar de processar as docstrings
+    APIDOCS_ENABLED = os.environ.get("APIDOCS_ENABLED", "1") == "1"
+    APISPEC_FILE = os.environ.get("APISPEC_FILE")
+
+    # PRAGMAs aplicados em cada nova conexão SQLite (ver models/pragmas.py)
+    SQLITE_PRAGMAS = {}
+
+    # Gravação de agendamentos em grupo por uma thread escritora dedicada:
+    # até APPOINTMENT_BATCH_MAX_SIZE agendamentos por commit, aguardando no
+    # máximo APPOINTMENT_BATCH_MAX_WAIT_MS para formar o grupo
+    APPOINTMENT_WRITE_BATCHING = False
+    APPOINTMENT_BATCH_MAX_SIZE = 32
+    APPOINTMENT_BATCH_MAX_WAIT_MS = 5
+    APPOINTMENT_BATCH_TIMEOUT = 10
+
+class ProductionConfig(Config):
+    CONFIG_NAME = "production"
+
+    # Sem padrão: create_app falha se a variável não estiver definida
+    SECRET_KEY = os.environ.get("SECRET_KEY")
+
+    # Em produção os agendamentos encerrados passam a 'done' a cada minuto
+    # (e só então podem ser arquivados); a variável de ambiente ainda prevalece
+    APPOINTMENT_EXPIRY_INTERVAL = int(os.environ.get("APPOINTMENT_EXPIRY_INTERVAL", 60))
+
+    # Gerado no build com `flask build-apispec`; se ausente, as docstrings são processadas no primeiro acesso
+    APISPEC_FILE = os.environ.get("APISPEC_FILE", os.path.join(BASE_DIR, "../apispec.json"))
+
+    SQLITE_PRAGMAS = {
+        # WAL permite leituras concorrentes enquanto há uma escrita em andamento
+        "journal_mode": "WAL",
+        # Com WAL, NORMAL só sincroniza no checkpoint e continua seguro contra corrupção
+        "synchronous": "NORMAL",
+        # Valor negativo é em KiB: 64 MiB de cache de páginas por conexão
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        # Espera até 5 s pelo lock de escrita antes de "database is locked"
+        "busy_timeout": 5000,
+    }
+
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 10,
+        "pool_recycle": 3600,
+        "pool_pre_ping": True,
+        "connect_args": {"timeout": 5, "check_same_thread": False},
+    }
+
+CONFIGS = {
+    "default": Config,
+    "production": ProductionConfig,
+}
+
+def get_config(name=None):
+    """ Retorna o perfil de configuração pelo nome ou pela variável CHARGEHUB_CONFIG """
+    name = name or os.environ.get("CHARGEHUB_CONFIG", "default")
+    if name not in CONFIGS:
+        raise ValueError(f"Perfil de configuração desconhecido: {name}")
+    return CONFIGS[name]
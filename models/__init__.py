@@ -5,4 +5,6 @@ db = SQLAlchemy()
 from .user import User
 from .location import Location
 from .charger import Charger
-from .appointment import Appointment
\ No newline at end of file
+from .appointment import Appointment, AppointmentArchive
+from .usage import ChargerUsageHourly
+from .table_version import TableVersion
@@ -1,5 +1,7 @@
 from . import db
 
+STATUSES = ('confirmed', 'canceled', 'done')
+
 class Appointment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
@@ -14,8 +16,40 @@ class Appointment(db.Model):
     charger = db.relationship('Charger', backref=db.backref('appointments', lazy=True, cascade="all, delete-orphan"))
 
     __table_args__ = (
-        db.CheckConstraint("status IN ('confirmed', 'canceled', 'done')"),
+        db.CheckConstraint(f"status IN {STATUSES}"),
+        db.Index('ix_appointment_charger_time', 'charger_id', 'start_time', 'end_time'),
+        db.Index('ix_appointment_user_start', 'user_id', 'start_time'),
+        db.Index('ix_appointment_status_end', 'status', 'end_time'),
+        # AUTOINCREMENT: ids excluídos ou arquivados nunca são reaproveitados
+        {'sqlite_autoincrement': True},
+    )
+
+    def __repr__(self):
+        return f'<Appointment {self.id} - Status: {self.status}>'
+
+class AppointmentArchive(db.Model):
+    """
+    Agendamentos finalizados ('done' ou 'canceled') movidos da tabela principal
+    pelo job de arquivamento (ver models/archival.py). Mantém o id original.
+    """
+    __tablename__ = 'appointment_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    charger_id = db.Column(db.Integer, db.ForeignKey('charger.id', ondelete='CASCADE'), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    user = db.relationship('User', backref=db.backref('archived_appointments', lazy=True, cascade="all, delete-orphan"))
+    charger = db.relationship('Charger', backref=db.backref('archived_appointments', lazy=True, cascade="all, delete-orphan"))
+
+    __table_args__ = (
+        db.CheckConstraint(f"status IN {STATUSES}"),
+        db.Index('ix_appointment_archive_user_start', 'user_id', 'start_time'),
     )
 
     def __repr__(self):
-        return f'<Appointment {self.id} - Status: {self.status}>'
\ No newline at end of file
+        return f'<AppointmentArchive {self.id} - Status: {self.status}>'
@@ -0,0 +1,90 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, delete, insert, literal, select
+from . import db
+from .appointment import Appointment, AppointmentArchive
+
+logger = logging.getLogger("chargehub.jobs")
+
+# Status que encerram um agendamento e permitem arquivá-lo
+FINISHED_STATUSES = ("done", "canceled")
+ARCHIVED_COLUMNS = ("id", "user_id", "charger_id", "start_time", "end_time", "status", "created_at")
+
+
+def archive_appointments(older_than_days, batch_size=1000, max_batches=None, on_batch=None):
+    """
+    Move para `appointment_archive` os agendamentos finalizados que terminaram há
+    mais de `older_than_days` dias, em lotes de `batch_size` linhas, cada lote na
+    sua própria transação (INSERT ... SELECT seguido de DELETE). Percorre a
+    tabela pela chave primária, de modo que cada lote continua de onde o
+    anterior parou. `on_batch` recebe as linhas (id, charger_id, start_time) de
+    cada lote após o commit. Retorna a quantidade de linhas movidas.
+    """
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    archived_at = datetime.now()
+
+    moved, batches, last_id = 0, 0, 0
+    while max_batches is None or batches < max_batches:
+        with db.engine.begin() as conn:
+            rows = conn.execute(
+                select(Appointment.id, Appointment.charger_id, Appointment.start_time)
+                .where(
+                    Appointment.id > last_id,
+                    Appointment.status.in_(FINISHED_STATUSES),
+                    Appointment.end_time < cutoff,
+                )
+                .order_by(Appointment.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            ids = [row.id for row in rows]
+            conn.execute(insert(AppointmentArchive).from_select(
+                [*ARCHIVED_COLUMNS, "archived_at"],
+                select(*(getattr(Appointment, c) for c in ARCHIVED_COLUMNS), literal(archived_at, DateTime))
+                .where(Appointment.id.in_(ids)),
+            ))
+            conn.execute(delete(Appointment).where(Appointment.id.in_(ids)))
+
+        moved += len(rows)
+        batches += 1
+        last_id = ids[-1]
+        if on_batch is not None:
+            on_batch(rows)
+        if len(rows) < batch_size:
+            break
+    return moved
+
+
+def run_archival(app, older_than_days=None, batch_size=None, max_batches=None):
+    """
+    Arquiva com os parâmetros de APPOINTMENT_ARCHIVE_* (ou os informados) e
+    retira do índice de intervalos deste processo as linhas movidas
+    """
+    from utils.interval_index import appointment_index
+    from utils.metrics import job_metrics
+
+    def release(rows):
+        for row in rows:
+            appointment_index.release(row.charger_id, row.start_time, row.id)
+
+    started = time.perf_counter()
+    moved = archive_appointments(
+        app.config["APPOINTMENT_ARCHIVE_AFTER_DAYS"] if older_than_days is None else older_than_days,
+        batch_size or app.config["APPOINTMENT_ARCHIVE_BATCH_SIZE"],
+        max_batches=max_batches,
+        on_batch=release,
+    )
+    job_metrics.observe("appointment-archival", moved, time.perf_counter() - started)
+    if moved:
+        logger.info("%d agendamentos arquivados", moved)
+    return moved
+
+
+def init_archival(app):
+    """ Agenda o arquivamento periódico se APPOINTMENT_ARCHIVE_INTERVAL > 0 """
+    from utils.periodic import start_periodic_when_serving
+
+    start_periodic_when_serving(app, "appointment-archival", app.config["APPOINTMENT_ARCHIVE_INTERVAL"],
+                                lambda: run_archival(app))
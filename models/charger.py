@@ -1,5 +1,7 @@
 from . import db
 
+STATUSES = ('available', 'unavailable', 'maintenance')
+
 class Charger(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     location_id = db.Column(db.Integer, db.ForeignKey('location.id', ondelete='CASCADE'), nullable=False)
@@ -9,7 +11,9 @@ class Charger(db.Model):
     location = db.relationship('Location', backref=db.backref('chargers', lazy=True, cascade="all, delete-orphan"))
 
     __table_args__ = (
-        db.CheckConstraint("status IN ('available', 'unavailable', 'maintenance')", name="check_status"),
+        db.CheckConstraint(f"status IN {STATUSES}", name="check_status"),
+        db.Index('ix_charger_location_status', 'location_id', 'status'),
+        db.Index('ix_charger_status', 'status'),
     )
 
     def __repr__(self):
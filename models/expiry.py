@@ -0,0 +1,55 @@
+import logging
+import time
+from datetime import datetime
+from sqlalchemy import select, update
+from . import db
+from .appointment import Appointment
+
+logger = logging.getLogger("chargehub.jobs")
+
+
+def expire_appointments(batch_size=1000, now=None, max_batches=None):
+    """
+    Marca como 'done' os agendamentos 'confirmed' cujo end_time já passou, com
+    um UPDATE por lote de até `batch_size` linhas, cada lote na sua própria
+    transação para não segurar o lock de escrita do SQLite. Os lotes são
+    escolhidos pelo índice (status, end_time). Retorna a quantidade de linhas
+    alteradas.
+    """
+    now = now or datetime.now()
+    expired = select(Appointment.id).where(
+        Appointment.status == "confirmed",
+        Appointment.end_time < now,
+    ).limit(batch_size).scalar_subquery()
+    statement = update(Appointment).where(Appointment.id.in_(expired)).values(status="done")
+
+    changed, batches = 0, 0
+    while max_batches is None or batches < max_batches:
+        with db.engine.begin() as conn:
+            rowcount = conn.execute(statement).rowcount
+        changed += rowcount
+        batches += 1
+        if rowcount < batch_size:
+            break
+    return changed
+
+
+def run_expiry(app, batch_size=None, max_batches=None):
+    """ Executa expire_appointments com APPOINTMENT_EXPIRY_BATCH_SIZE e publica a métrica do job """
+    from utils.metrics import job_metrics
+
+    started = time.perf_counter()
+    changed = expire_appointments(batch_size or app.config["APPOINTMENT_EXPIRY_BATCH_SIZE"],
+                                  max_batches=max_batches)
+    job_metrics.observe("appointment-expiry", changed, time.perf_counter() - started)
+    if changed:
+        logger.info("%d agendamentos marcados como concluídos", changed)
+    return changed
+
+
+def init_expiry(app):
+    """ Agenda a conclusão periódica dos agendamentos se APPOINTMENT_EXPIRY_INTERVAL > 0 """
+    from utils.periodic import start_periodic_when_serving
+
+    start_periodic_when_serving(app, "appointment-expiry", app.config["APPOINTMENT_EXPIRY_INTERVAL"],
+                                lambda: run_expiry(app))
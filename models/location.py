@@ -4,8 +4,14 @@ class Location(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     address = db.Column(db.Text, nullable=False)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
 
+    __table_args__ = (
+        db.Index('ux_location_name', 'name', unique=True),
+    )
+
     def __repr__(self):
         return f'<Location {self.name}>'
     
@@ -15,5 +21,7 @@ class Location(db.Model):
             "id": self.id,
             "name": self.name,
             "address": self.address,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
\ No newline at end of file
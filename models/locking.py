@@ -0,0 +1,26 @@
+from sqlalchemy import Connection, exists, select
+from .appointment import Appointment
+
+
+def begin_immediate(bind):
+    """
+    Abre a transação de `bind` (Session ou Connection) com BEGIN IMMEDIATE, que
+    toma o lock de escrita do SQLite já no início: leituras feitas em seguida
+    não podem ser invalidadas por outro processo antes do commit. Não faz nada
+    se a conexão já estiver em uma transação ou se o banco não for SQLite.
+    """
+    conn = bind if isinstance(bind, Connection) else bind.connection()
+    if conn.dialect.name != "sqlite":
+        return
+    if not conn.connection.driver_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def charger_is_taken(session, charger_id, start_time, end_time):
+    """ Consulta no banco (índice ix_appointment_charger_time) se o carregador tem agendamento em [start, end) """
+    return session.scalar(select(exists().where(
+        Appointment.charger_id == charger_id,
+        Appointment.start_time < end_time,
+        Appointment.end_time > start_time,
+        Appointment.status != "canceled",
+    )))
@@ -0,0 +1,141 @@
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from . import db
+from .appointment import Appointment, AppointmentArchive
+from .usage import ChargerUsageHourly, rebuild_usage
+from .table_version import TableVersion, install_version_triggers
+from .locking import begin_immediate
+
+# Migrações versionadas aplicadas na inicialização. Cada item é
+# (versão, descrição, passos); um passo é um comando SQL ou uma função que
+# recebe a conexão. Os passos devem ser idempotentes, pois um banco novo já
+# recebe o esquema completo via `db.create_all()`.
+MIGRATIONS = [
+    (1, "Índices das colunas de busca", [
+        "CREATE INDEX IF NOT EXISTS ix_appointment_charger_time "
+        "ON appointment (charger_id, start_time, end_time)",
+        "CREATE INDEX IF NOT EXISTS ix_appointment_user_start "
+        "ON appointment (user_id, start_time)",
+        "CREATE INDEX IF NOT EXISTS ix_charger_location_status "
+        "ON charger (location_id, status)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_location_name "
+        "ON location (name)",
+    ]),
+    (2, "Índice de status dos carregadores", [
+        "CREATE INDEX IF NOT EXISTS ix_charger_status ON charger (status)",
+    ]),
+    (3, "Coordenadas das localizações", [
+        lambda conn: _add_column(conn, "location", "latitude", "FLOAT"),
+        lambda conn: _add_column(conn, "location", "longitude", "FLOAT"),
+    ]),
+    (4, "Tabela de agendamentos arquivados", [
+        lambda conn: AppointmentArchive.__table__.create(conn, checkfirst=True),
+    ]),
+    (5, "Índice de expiração dos agendamentos", [
+        "CREATE INDEX IF NOT EXISTS ix_appointment_status_end "
+        "ON appointment (status, end_time)",
+    ]),
+    (6, "Rollup de ocupação por hora dos carregadores", [
+        lambda conn: ChargerUsageHourly.__table__.create(conn, checkfirst=True),
+        rebuild_usage,
+    ]),
+    (7, "Versões das tabelas para o cache de respostas", [
+        lambda conn: TableVersion.__table__.create(conn, checkfirst=True),
+        install_version_triggers,
+    ]),
+    (8, "AUTOINCREMENT nos ids dos agendamentos", [
+        lambda conn: _rebuild_with_autoincrement(conn, Appointment.__table__),
+        lambda conn: _reserve_ids(conn, "appointment", AppointmentArchive.__tablename__),
+    ]),
+]
+
+
+def _add_column(conn, table, column, ddl_type):
+    """ ALTER TABLE ADD COLUMN apenas se a coluna ainda não existir """
+    columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def _rebuild_with_autoincrement(conn, table):
+    """
+    Recria `table` com AUTOINCREMENT (o SQLite não permite alterar a chave
+    primária): renomeia a tabela antiga, cria a nova com os índices do modelo,
+    copia as linhas mantendo os ids e apaga a antiga. Nada é feito se a tabela
+    já tiver AUTOINCREMENT.
+    """
+    ddl = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table.name}
+    ).scalar()
+    if ddl is None or "AUTOINCREMENT" in ddl.upper():
+        return
+
+    old_name = f"{table.name}_old"
+    columns = ", ".join(column.name for column in table.columns)
+    for index in table.indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {old_name}"))
+    table.create(conn)
+    conn.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old_name}"))
+    conn.execute(text(f"DROP TABLE {old_name}"))
+
+
+def _reserve_ids(conn, table, *other_tables):
+    """ Faz o AUTOINCREMENT de `table` continuar depois do maior id de `table` e de `other_tables` """
+    max_ids = " UNION ALL ".join(f"SELECT max(id) AS id FROM {name}" for name in (table, *other_tables))
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table})
+    conn.execute(text(
+        f"INSERT INTO sqlite_sequence (name, seq) SELECT :name, coalesce(max(id), 0) FROM ({max_ids})"
+    ), {"name": table})
+
+
+def _applied_versions(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "description TEXT NOT NULL, "
+        "applied_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_version"))}
+
+
+def run_migrations():
+    """
+    Aplica, em ordem, as migrações ainda não registradas em `schema_version`.
+    Cada migração roda com o lock de escrita e confere de novo a versão, para
+    que vários workers iniciando juntos não apliquem a mesma migração duas vezes.
+    """
+    with db.engine.begin() as conn:
+        applied = _applied_versions(conn)
+
+    for version, description, steps in MIGRATIONS:
+        if version in applied:
+            continue
+
+        try:
+            with db.engine.begin() as conn:
+                begin_immediate(conn)
+                if version in _applied_versions(conn):
+                    continue
+                print(f"🔧 Aplicando migração {version}: {description}")
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(text(step))
+                conn.execute(
+                    text("INSERT INTO schema_version (version, description) VALUES (:v, :d)"),
+                    {"v": version, "d": description},
+                )
+        except IntegrityError as e:
+            raise RuntimeError(
+                f"Migração {version} falhou por dados duplicados ou inconsistentes: {e.orig}"
+            ) from e
+
+
+def init_schema():
+    """ Cria as tabelas que faltam e aplica as migrações pendentes; seguro para rodar a cada inicialização """
+    with db.engine.begin() as conn:
+        begin_immediate(conn)
+        db.metadata.create_all(conn)
+    run_migrations()
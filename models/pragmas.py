@@ -0,0 +1,27 @@
+from sqlalchemy import event, text
+from . import db
+
+
+def apply_sqlite_pragmas(app):
+    """ Registra no engine de `models.db` um hook que aplica SQLITE_PRAGMAS a cada conexão """
+    pragmas = app.config.get("SQLITE_PRAGMAS") or {}
+
+    with app.app_context():
+        engine = db.engine
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def effective_sqlite_pragmas(names):
+    """ Lê os valores efetivos dos PRAGMAs em uma conexão do pool """
+    if db.engine.dialect.name != "sqlite":
+        return {}
+    with db.engine.connect() as conn:
+        return {name: conn.execute(text(f"PRAGMA {name}")).scalar() for name in names}
@@ -0,0 +1,199 @@
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from werkzeug.security import generate_password_hash
+from . import db
+from .appointment import Appointment
+from .charger import Charger, STATUSES as CHARGER_STATUSES
+from .location import Location
+from .usage import rebuild_usage
+from .user import User
+
+# Senha de todos os usuários sintéticos
+SYNTHETIC_PASSWORD = "chargehub"
+DEFAULT_CHUNK_SIZE = 50000
+
+# Horário de funcionamento dos carregadores e durações possíveis, em minutos
+OPEN_MINUTE, CLOSE_MINUTE = 6 * 60, 23 * 60
+DURATIONS = (30, 60, 60, 90, 120, 120, 180)
+# Intervalo livre médio entre reservas, em blocos de 15 minutos
+MEAN_GAP_SLOTS = 6
+# Fração de cada agenda que fica no passado
+HISTORY_FRACTION = 0.7
+
+
+def location_name(i):
+    return f"Local {i:06d}"
+
+
+def user_email(i):
+    return f"user{i}@chargehub.test"
+
+
+# Parte de hora do texto para cada minuto do dia
+_MINUTES = [f" {m // 60:02d}:{m % 60:02d}:00.000000" for m in range(1440)]
+
+
+class _Timestamps:
+    """
+    Converte minutos desde a meia-noite de `base` no texto que o tipo DateTime
+    do SQLAlchemy grava no SQLite ("AAAA-MM-DD HH:MM:SS.ffffff"), reaproveitando
+    o prefixo de cada dia. Gravar o mesmo formato mantém corretas as comparações
+    de datas feitas pelas consultas.
+    """
+
+    def __init__(self, base):
+        self.base = base.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._days = {}
+
+    def __call__(self, minutes):
+        day, minute = divmod(minutes, 1440)
+        prefix = self._days.get(day)
+        if prefix is None:
+            prefix = self._days[day] = (self.base + timedelta(days=day)).strftime("%Y-%m-%d")
+        return prefix + _MINUTES[minute]
+
+
+def _insert(table, columns, rows, chunk_size):
+    """
+    INSERT em lote com um commit por bloco de `chunk_size` linhas. O comando é
+    o insert() do Core compilado uma vez; as tuplas vão direto para o
+    executemany do driver, sem o processamento de tipos linha a linha.
+    """
+    statement = str(table.insert().compile(dialect=db.engine.dialect, column_keys=columns))
+    order = [c.name for c in table.columns if c.name in columns]
+    if order != list(columns):
+        raise ValueError(f"Colunas de {table.name} fora da ordem da tabela: {columns}")
+
+    total = 0
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return total
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(statement, chunk)
+        total += len(chunk)
+
+
+def _rebuilding_indexes(table, rows_to_insert, chunk_size):
+    """
+    Para cargas grandes, remove os índices não únicos de `table` antes da
+    inserção e os recria depois: construir o índice de uma vez, já ordenado, é
+    bem mais rápido que mantê-lo a cada linha. Retorna a função que os recria.
+    """
+    indexes = [index for index in table.indexes if not index.unique]
+    if rows_to_insert < 4 * chunk_size or not indexes:
+        return lambda: None
+    for index in indexes:
+        index.drop(db.engine, checkfirst=True)
+
+    def rebuild():
+        for index in indexes:
+            index.create(db.engine, checkfirst=True)
+    return rebuild
+
+
+def _next_id(model):
+    return (db.session.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def _schedule(rng, count, cursor, now):
+    """
+    Gera `count` intervalos (início, fim, status), em minutos, consecutivos e sem
+    sobreposição para um carregador, dentro do horário de funcionamento
+    """
+    expovariate, choice, random_ = rng.expovariate, rng.choice, rng.random
+    for _ in range(count):
+        cursor += 15 * int(expovariate(1 / MEAN_GAP_SLOTS))
+        duration = choice(DURATIONS)
+        day, minute = divmod(cursor, 1440)
+        if minute < OPEN_MINUTE:
+            cursor = day * 1440 + OPEN_MINUTE
+        elif minute + duration > CLOSE_MINUTE:
+            cursor = (day + 1) * 1440 + OPEN_MINUTE
+        end = cursor + duration
+        if end <= now:
+            status = "done" if random_() < 0.9 else "canceled"
+        else:
+            status = "confirmed" if random_() < 0.9 else "canceled"
+        yield cursor, end, status
+        cursor = end
+
+
+def generate_dataset(locations, chargers_per_location, users, appointments, seed=42,
+                     password_method="scrypt", chunk_size=DEFAULT_CHUNK_SIZE, log=print):
+    """
+    Insere uma massa de dados sintética e determinística para `seed`: localizações
+    na região metropolitana do Rio de Janeiro, carregadores por localização,
+    usuários e agendas sem sobreposição por carregador, com HISTORY_FRACTION de
+    cada agenda no passado (como 'done') e o restante futuro ('confirmed').
+    Retorna a data de início das agendas e a quantidade de linhas por tabela.
+    """
+    charger_count = locations * chargers_per_location
+    if appointments and (not charger_count or not users):
+        raise ValueError("Agendamentos exigem ao menos um carregador e um usuário")
+
+    rng = random.Random(seed)
+    now = datetime.now()
+    per_charger, extra = divmod(appointments, charger_count) if charger_count else (0, 0)
+    # Dias cobertos por uma agenda: reserva média + intervalo médio, no horário de funcionamento
+    slot_minutes = sum(DURATIONS) / len(DURATIONS) + 15 * (MEAN_GAP_SLOTS - 0.5)
+    span_days = (per_charger + bool(extra)) * slot_minutes / (CLOSE_MINUTE - OPEN_MINUTE)
+    base_time = (now - timedelta(days=math.ceil(span_days * HISTORY_FRACTION))).replace(
+        hour=OPEN_MINUTE // 60, minute=0, second=0, microsecond=0
+    )
+    timestamp = _Timestamps(base_time)
+    now_minutes = int((now - timestamp.base).total_seconds() // 60)
+    created_at = now.strftime("%Y-%m-%d %H:%M:%S.%f")
+    counts = {}
+
+    started = time.perf_counter()
+    first_location = _next_id(Location)
+    counts["location"] = _insert(Location.__table__, ("id", "name", "address", "latitude", "longitude", "created_at"), (
+        (first_location + i, location_name(first_location + i), f"Rua Sintética, {first_location + i}",
+         round(rng.uniform(-23.05, -22.75), 6), round(rng.uniform(-43.60, -43.10), 6), created_at)
+        for i in range(locations)
+    ), chunk_size)
+
+    first_charger = _next_id(Charger)
+    counts["charger"] = _insert(Charger.__table__, ("id", "location_id", "status", "created_at"), (
+        (first_charger + i, first_location + i // chargers_per_location,
+         "available" if rng.random() < 0.8 else rng.choice(CHARGER_STATUSES), created_at)
+        for i in range(charger_count)
+    ), chunk_size)
+
+    # O hash é o mesmo para todos: calcular um por usuário dominaria o tempo de geração
+    password_hash = generate_password_hash(SYNTHETIC_PASSWORD, password_method)
+    first_user = _next_id(User)
+    counts["user"] = _insert(User.__table__, ("id", "name", "email", "password_hash", "created_at"), (
+        (first_user + i, f"Usuário {first_user + i}", user_email(first_user + i), password_hash, created_at)
+        for i in range(users)
+    ), chunk_size)
+
+    def appointment_rows():
+        randrange = rng.randrange
+        for i in range(charger_count):
+            start = OPEN_MINUTE + 15 * randrange(16)
+            for begin, end, status in _schedule(rng, per_charger + (i < extra), start, now_minutes):
+                yield (first_user + randrange(users), first_charger + i,
+                       timestamp(begin), timestamp(end), status, created_at)
+
+    rebuild_indexes = _rebuilding_indexes(Appointment.__table__, appointments, chunk_size)
+    try:
+        counts["appointment"] = _insert(
+            Appointment.__table__,
+            ("user_id", "charger_id", "start_time", "end_time", "status", "created_at"),
+            appointment_rows(), chunk_size,
+        )
+    finally:
+        rebuild_indexes()
+    # O INSERT direto não passa pelas rotas: o rollup de ocupação dos novos carregadores é calculado aqui
+    with db.engine.begin() as conn:
+        rebuild_usage(conn, first_charger)
+    log(f"✅ {sum(counts.values())} linhas inseridas em {time.perf_counter() - started:.1f} s: "
+        + ", ".join(f"{table}={n}" for table, n in counts.items()))
+    return base_time, counts
@@ -0,0 +1,45 @@
+from sqlalchemy import event, text
+from . import db
+
+# Tabelas cujas escritas invalidam as respostas em cache (ver utils/cache.py)
+TRACKED_TABLES = ("location", "charger")
+
+
+class TableVersion(db.Model):
+    """
+    Versão de cada tabela em TRACKED_TABLES, incrementada por triggers na mesma
+    transação de qualquer INSERT, UPDATE ou DELETE, venha ele de qualquer
+    processo (workers do gunicorn, `flask seed`, SQL direto). As ETags e o
+    cache de respostas usam essas versões.
+    """
+    __tablename__ = 'table_version'
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<TableVersion {self.name}: {self.version}>'
+
+
+def install_version_triggers(conn):
+    """ Cria as linhas de versão e os triggers das tabelas monitoradas (idempotente) """
+    for table in TRACKED_TABLES:
+        # A versão inicial é o instante da criação, em ms: um banco recriado não
+        # repete as versões (e as ETags) de um banco anterior
+        conn.execute(text(
+            "INSERT OR IGNORE INTO table_version (name, version) "
+            "VALUES (:name, CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER))"
+        ), {"name": table})
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS tv_{table}_{operation.lower()} "
+                f"AFTER {operation} ON {table} BEGIN "
+                f"UPDATE table_version SET version = version + 1 WHERE name = '{table}'; END"
+            ))
+
+
+@event.listens_for(db.metadata, "after_create")
+def _install_after_create_all(target, connection, **kw):
+    """ db.create_all() também instala os triggers, depois que todas as tabelas existem """
+    if all(connection.dialect.has_table(connection, name) for name in (TableVersion.__tablename__, *TRACKED_TABLES)):
+        install_version_triggers(connection)
@@ -0,0 +1,147 @@
+from datetime import datetime
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from . import db
+from .appointment import Appointment, AppointmentArchive
+
+# Buckets acumulados em memória antes de cada gravação durante o recálculo
+REBUILD_FLUSH_SIZE = 50000
+
+
+class ChargerUsageHourly(db.Model):
+    """
+    Segundos ocupados por agendamentos (exceto cancelados) em cada hora de cada
+    carregador. Mantida a cada criação ou exclusão de agendamento por
+    `record_usage` e recalculada a partir dos agendamentos por `rebuild_usage`.
+    """
+    __tablename__ = 'charger_usage_hourly'
+
+    charger_id = db.Column(db.Integer, db.ForeignKey('charger.id', ondelete='CASCADE'), primary_key=True)
+    hour = db.Column(db.DateTime, primary_key=True)
+    busy_seconds = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Índice de cobertura: os relatórios de todos os carregadores leem só o índice
+    __table_args__ = (
+        db.Index('ix_charger_usage_hour', 'hour', 'charger_id', 'busy_seconds'),
+    )
+
+    def __repr__(self):
+        return f'<ChargerUsageHourly {self.charger_id} {self.hour}: {self.busy_seconds}s>'
+
+
+def floor_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _hour_number(moment):
+    """ Hora de `moment` como inteiro (horas desde o dia 1 do calendário) """
+    return moment.toordinal() * 24 + moment.hour
+
+
+def _hour_start(number):
+    day, hour = divmod(number, 24)
+    return datetime.fromordinal(day).replace(hour=hour)
+
+
+def hour_spans(start_time, end_time):
+    """
+    Divide [start_time, end_time) em (número da hora, segundos ocupados na
+    hora), com resolução de segundos. A conta é feita com inteiros porque
+    roda para cada agendamento no recálculo do rollup.
+    """
+    first, last = _hour_number(start_time), _hour_number(end_time)
+    start_offset = start_time.minute * 60 + start_time.second
+    end_offset = end_time.minute * 60 + end_time.second
+    if first == last:
+        if end_offset > start_offset:
+            yield first, end_offset - start_offset
+        return
+    yield first, 3600 - start_offset
+    for number in range(first + 1, last):
+        yield number, 3600
+    if end_offset:
+        yield last, end_offset
+
+
+def _upsert():
+    table = ChargerUsageHourly.__table__
+    statement = sqlite_insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.charger_id, table.c.hour],
+        set_={"busy_seconds": table.c.busy_seconds + statement.excluded.busy_seconds},
+    )
+
+
+def _write(executor, totals):
+    if totals:
+        executor.execute(_upsert(), [
+            {"charger_id": charger_id, "hour": _hour_start(number), "busy_seconds": seconds}
+            for (charger_id, number), seconds in totals.items()
+        ])
+
+
+def record_usage(executor, intervals, sign=1):
+    """
+    Soma (sign=1) ou subtrai (sign=-1) de charger_usage_hourly os intervalos
+    (charger_id, start_time, end_time), com um único INSERT ... ON CONFLICT DO
+    UPDATE. `executor` é a sessão ou a conexão da transação que grava os
+    agendamentos, para que o rollup seja confirmado ou desfeito junto com eles.
+    """
+    totals = {}
+    for charger_id, start_time, end_time in intervals:
+        for number, seconds in hour_spans(start_time, end_time):
+            key = (charger_id, number)
+            totals[key] = totals.get(key, 0) + sign * seconds
+    _write(executor, totals)
+
+
+def rebuild_usage(conn, first_charger_id=0):
+    """
+    Recalcula o rollup dos carregadores com id >= first_charger_id a partir dos
+    agendamentos não cancelados, incluindo os arquivados. As datas são lidas e
+    gravadas como texto pelo driver, no formato do tipo DateTime, sem o
+    processamento de tipos linha a linha do SQLAlchemy, e os buckets são
+    gravados em ordem de chave a cada REBUILD_FLUSH_SIZE chaves.
+    """
+    table = ChargerUsageHourly.__table__
+    conn.execute(delete(table).where(table.c.charger_id >= first_charger_id))
+    # Manter o índice por hora a cada linha custa mais que recriá-lo ao final
+    hour_indexes = [index for index in table.indexes if not index.unique]
+    for index in hour_indexes:
+        index.drop(conn, checkfirst=True)
+
+    upsert = str(_upsert().compile(dialect=conn.dialect, column_keys=["charger_id", "hour", "busy_seconds"]))
+    render_hour = table.c.hour.type.dialect_impl(conn.dialect).bind_processor(conn.dialect)
+    hour_text = {}
+
+    def flush(totals):
+        rows = []
+        for (charger_id, number), seconds in sorted(totals.items()):
+            text = hour_text.get(number)
+            if text is None:
+                text = hour_text[number] = render_hour(_hour_start(number))
+            rows.append((charger_id, text, seconds))
+        if rows:
+            conn.exec_driver_sql(upsert, rows)
+
+    parse = datetime.fromisoformat
+    totals = {}
+    for model in (Appointment, AppointmentArchive):
+        source = model.__table__
+        statement = str(
+            select(source.c.charger_id, source.c.start_time, source.c.end_time)
+            .where(source.c.charger_id >= first_charger_id, source.c.status != "canceled")
+            .compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+        )
+        cursor = conn.exec_driver_sql(statement)
+        while rows := cursor.fetchmany(REBUILD_FLUSH_SIZE):
+            for charger_id, start_time, end_time in rows:
+                for number, seconds in hour_spans(parse(start_time), parse(end_time)):
+                    key = (charger_id, number)
+                    totals[key] = totals.get(key, 0) + seconds
+            if len(totals) >= REBUILD_FLUSH_SIZE:
+                flush(totals)
+                totals = {}
+    flush(totals)
+    for index in hour_indexes:
+        index.create(conn, checkfirst=True)
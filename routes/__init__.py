@@ -5,6 +5,8 @@ from .user_routes import user_bp
 from .location_routes import location_bp
 from .charger_routes import charger_bp
 from .appointment_routes import appointment_bp
+from .diagnostics_routes import diagnostics_bp
+from .analytics_routes import analytics_bp
 # from .car_routes import car_bp
 
 # Criar um Blueprint principal para agrupar todas as rotas (opcional)
@@ -15,6 +17,8 @@ api_bp.register_blueprint(user_bp, url_prefix='/users')
 api_bp.register_blueprint(location_bp, url_prefix='/locations')
 api_bp.register_blueprint(charger_bp, url_prefix='/chargers')
 api_bp.register_blueprint(appointment_bp, url_prefix='/appointments')
+api_bp.register_blueprint(diagnostics_bp, url_prefix='/diagnostics')
+api_bp.register_blueprint(analytics_bp, url_prefix='/analytics')
 # api_bp.register_blueprint(car_bp, url_prefix='/cars')
 
 # Lista de Blueprints para fácil registro no app principal
@@ -0,0 +1,242 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify
+from sqlalchemy import func, select
+from models import db
+from models.charger import Charger
+from models.location import Location
+from models.usage import ChargerUsageHourly, floor_hour
+from utils.datetime_utils import parse_iso_datetime
+
+analytics_bp = Blueprint('analytics_bp', __name__)
+
+# Período padrão e máximo da consulta de ocupação
+DEFAULT_UTILIZATION_RANGE = timedelta(days=7)
+MAX_UTILIZATION_RANGE = timedelta(days=31)
+# Quantidade de horas do dia reportadas como pico
+PEAK_HOURS = 3
+
+def _percent(busy_seconds, capacity_seconds):
+    return round(100 * busy_seconds / capacity_seconds, 2) if capacity_seconds else 0.0
+
+@analytics_bp.route('/utilization', methods=['GET'])
+def get_utilization():
+    """
+    Ocupação dos carregadores por carregador, por localização e por hora do dia
+    ---
+    tags:
+      - Analytics
+    parameters:
+      - name: location_id
+        in: query
+        type: integer
+        required: false
+        description: Restringe o relatório aos carregadores de uma localização
+        example: 1
+      - name: from
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: Início do período (ISO 8601, arredondado para a hora cheia; padrão fim - 7 dias)
+        example: 2025-04-01T00:00
+      - name: to
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: Fim do período (ISO 8601, arredondado para a próxima hora cheia; padrão agora, máximo 31 dias)
+        example: 2025-04-08T00:00
+    responses:
+      200:
+        description: Percentual do tempo ocupado por agendamentos no período
+        schema:
+          type: object
+          properties:
+            from:
+              type: string
+              format: date-time
+              example: 2025-04-01T00:00:00
+            to:
+              type: string
+              format: date-time
+              example: 2025-04-08T00:00:00
+            location_id:
+              type: integer
+              example: 1
+            hours:
+              type: integer
+              example: 168
+            utilization:
+              type: number
+              example: 37.5
+            locations:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 1
+                  name:
+                    type: string
+                    example: Estacionamento x
+                  chargers:
+                    type: integer
+                    example: 4
+                  busy_hours:
+                    type: number
+                    example: 252.0
+                  utilization:
+                    type: number
+                    example: 37.5
+            chargers:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 5
+                  location_id:
+                    type: integer
+                    example: 1
+                  busy_hours:
+                    type: number
+                    example: 63.0
+                  utilization:
+                    type: number
+                    example: 37.5
+            by_hour:
+              type: array
+              description: Ocupação média de cada hora do dia (0 a 23)
+              items:
+                type: object
+                properties:
+                  hour:
+                    type: integer
+                    example: 18
+                  utilization:
+                    type: number
+                    example: 82.1
+            peak_hours:
+              type: array
+              items:
+                type: integer
+              example: [18, 19, 8]
+            idle_chargers:
+              type: array
+              description: Carregadores sem nenhum agendamento no período
+              items:
+                type: integer
+              example: [7]
+      400:
+        description: Parâmetros inválidos
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: O período consultado deve ter no máximo 31 dias
+      404:
+        description: Localização não encontrada
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Local não encontrado
+    """
+    try:
+        location_id = int(request.args['location_id']) if request.args.get('location_id') else None
+    except ValueError:
+        return jsonify({"error": "O parâmetro location_id deve ser um número inteiro"}), 400
+
+    try:
+        end = parse_iso_datetime(request.args['to']) if request.args.get('to') else datetime.now()
+        start = parse_iso_datetime(request.args['from']) if request.args.get('from') else end - DEFAULT_UTILIZATION_RANGE
+    except ValueError:
+        return jsonify({"error": "Formato de data inválido. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS)"}), 400
+
+    # O rollup é por hora: o período é estendido para horas cheias
+    start = floor_hour(start)
+    end = floor_hour(end) + timedelta(hours=1) if end != floor_hour(end) else end
+    if end <= start:
+        return jsonify({"error": "O fim do período deve ser maior que o início"}), 400
+    if end - start > MAX_UTILIZATION_RANGE:
+        return jsonify({"error": "O período consultado deve ter no máximo 31 dias"}), 400
+
+    chargers_query = db.session.query(Charger.id, Charger.location_id).order_by(Charger.id)
+    if location_id is not None:
+        chargers_query = chargers_query.filter_by(location_id=location_id)
+    chargers = chargers_query.all()
+    if location_id is not None and not chargers \
+            and not db.session.query(Location.id).filter_by(id=location_id).first():
+        return jsonify({"error": "Local não encontrado"}), 404
+
+    # Agrega o rollup no banco: uma linha por carregador e uma por hora do período
+    usage = ChargerUsageHourly
+    conditions = [usage.hour >= start, usage.hour < end]
+    if location_id is not None:
+        conditions.append(usage.charger_id.in_(select(Charger.id).where(Charger.location_id == location_id)))
+    busy_by_charger = dict(db.session.execute(
+        select(usage.charger_id, func.sum(usage.busy_seconds)).where(*conditions).group_by(usage.charger_id)
+    ).all())
+    # Agrupar pela própria coluna segue a ordem do índice; a hora do dia é somada aqui
+    busy_by_hour = [0] * 24
+    for hour, busy in db.session.execute(
+        select(usage.hour, func.sum(usage.busy_seconds)).where(*conditions).group_by(usage.hour)
+    ):
+        busy_by_hour[hour.hour] += busy
+
+    hours = int((end - start) / timedelta(hours=1))
+    capacity = hours * 3600
+
+    chargers_data, idle_chargers = [], []
+    busy_by_location = {}
+    for ch in chargers:
+        busy = busy_by_charger.get(ch.id, 0)
+        if not busy:
+            idle_chargers.append(ch.id)
+        totals = busy_by_location.setdefault(ch.location_id, [0, 0])
+        totals[0] += 1
+        totals[1] += busy
+        chargers_data.append({
+            'id': ch.id,
+            'location_id': ch.location_id,
+            'busy_hours': round(busy / 3600, 2),
+            'utilization': _percent(busy, capacity),
+        })
+
+    names = dict(db.session.query(Location.id, Location.name).filter(Location.id.in_(busy_by_location)))
+    locations_data = [{
+        'id': loc_id,
+        'name': names.get(loc_id),
+        'chargers': count,
+        'busy_hours': round(busy / 3600, 2),
+        'utilization': _percent(busy, count * capacity),
+    } for loc_id, (count, busy) in sorted(busy_by_location.items())]
+
+    # Quantas vezes cada hora do dia aparece no período
+    occurrences = [0] * 24
+    for offset in range(hours):
+        occurrences[(start + timedelta(hours=offset)).hour] += 1
+    by_hour = [{
+        'hour': hour,
+        'utilization': _percent(busy_by_hour[hour], occurrences[hour] * 3600 * len(chargers)),
+    } for hour in range(24)]
+    peak_hours = [item['hour'] for item in sorted(by_hour, key=lambda item: -item['utilization'])
+                  if item['utilization'] > 0][:PEAK_HOURS]
+
+    total_busy = sum(busy for _, busy in busy_by_location.values())
+    return jsonify({
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'location_id': location_id,
+        'hours': hours,
+        'utilization': _percent(total_busy, capacity * len(chargers)),
+        'locations': locations_data,
+        'chargers': chargers_data,
+        'by_hour': by_hour,
+        'peak_hours': peak_hours,
+        'idle_chargers': idle_chargers,
+    })
@@ -1,13 +1,119 @@
-from flask import Blueprint, request, jsonify
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import select, tuple_, union_all
 from models import db
-from models.appointment import Appointment
+from models.appointment import Appointment, AppointmentArchive, STATUSES
 from models.user import User
 from models.charger import Charger
 from models.location import Location
+from models.locking import begin_immediate, charger_is_taken
+from models.usage import record_usage
+from utils.bulk_insert import insert_returning_ids
 from utils.datetime_utils import parse_iso_datetime
+from utils.group_commit import get_writer
+from utils.interval_index import appointment_index
+from utils.auth import InvalidToken, token_identity
+from utils.cache import locations_by_name, user_ids_by_email
+from utils.pagination import encode_cursor, decode_cursor, parse_limit
+from utils.streaming import STREAM_BATCH_SIZE, json_array_response, wants_stream
 
 appointment_bp = Blueprint('appointment_bp', __name__)
 
+# Tamanho padrão e máximo das páginas de agendamentos
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Quantidade máxima de agendamentos por requisição em /batch
+MAX_BATCH_SIZE = 500
+
+def _resolve_user_id(email):
+    """ id do usuário pelo email, consultando antes o cache de identidade """
+    user_id = user_ids_by_email.get(email)
+    if user_id is None:
+        user_id = db.session.query(User.id).filter_by(email=email).scalar()
+        if user_id is not None:
+            user_ids_by_email.set(email, user_id)
+    return user_id
+
+def _resolve_location(name):
+    """ (id do local, ids dos carregadores) pelo nome do local, com cache """
+    location = locations_by_name.get(name)
+    if location is None:
+        location_id = db.session.query(Location.id).filter_by(name=name).scalar()
+        if location_id is None:
+            return None
+        charger_ids = tuple(cid for (cid,) in db.session.query(Charger.id)
+                            .filter_by(location_id=location_id)
+                            .order_by(Charger.id))
+        location = (location_id, charger_ids)
+        locations_by_name.set(name, location)
+    return location
+
+def _reserve_charger(charger_ids, start_time, end_time):
+    """
+    Reserva no índice o primeiro carregador livre e confirma a escolha no banco.
+    O índice é local ao processo e não vê agendamentos gravados por outros
+    workers: com o lock de escrita já tomado, um carregador ocupado no banco é
+    recarregado no índice e o próximo da lista é tentado. Retorna o id do
+    carregador ou None se todos estiverem ocupados.
+    """
+    candidates = list(charger_ids)
+    while True:
+        charger_id = appointment_index.reserve(candidates, start_time, end_time)
+        if charger_id is None:
+            return None
+        try:
+            taken = charger_is_taken(db.session, charger_id, start_time, end_time)
+        except Exception:
+            appointment_index.release(charger_id, start_time)
+            raise
+        if not taken:
+            return charger_id
+        appointment_index.release(charger_id, start_time)
+        appointment_index.invalidate(charger_id)
+        candidates = candidates[candidates.index(charger_id) + 1:]
+
+def _book_appointment(user_id, charger_ids, start_time, end_time):
+    """
+    Toma o lock de escrita (BEGIN IMMEDIATE), reserva o primeiro carregador livre
+    e adiciona o agendamento à sessão, sem commit. Retorna None se todos os
+    carregadores estiverem ocupados. Se algo falhar depois da reserva, ela é
+    liberada antes de a exceção seguir.
+    """
+    begin_immediate(db.session)
+    charger_id = _reserve_charger(charger_ids, start_time, end_time)
+    if charger_id is None:
+        return None
+
+    try:
+        appointment = Appointment(
+            user_id=user_id,
+            charger_id=charger_id,
+            start_time=start_time,
+            end_time=end_time,
+            status="confirmed"
+        )
+        db.session.add(appointment)
+        record_usage(db.session, [(charger_id, start_time, end_time)])
+    except Exception:
+        appointment_index.release(charger_id, start_time)
+        raise
+    return appointment
+
+def _appointment_committed(appointment):
+    """ Confirma a reserva no índice e devolve os dados do agendamento gravado """
+    appointment_index.assign(appointment.charger_id, appointment.start_time, appointment.id)
+    return {
+        "id": appointment.id,
+        "charger_id": appointment.charger_id,
+        "start_time": appointment.start_time.isoformat(),
+        "end_time": appointment.end_time.isoformat(),
+        "status": appointment.status
+    }
+
+def _appointment_rolled_back(appointment):
+    appointment_index.release(appointment.charger_id, appointment.start_time)
+
 @appointment_bp.route("/", methods=["POST"])
 def create_appointment():
     """
@@ -16,6 +122,11 @@ def create_appointment():
     tags:
       - Agendamentos
     parameters:
+      - name: Authorization
+        in: header
+        type: string
+        required: false
+        description: "Bearer <token> obtido no login; dispensa o campo email"
       - name: body
         in: body
         required: true
@@ -23,7 +134,6 @@ def create_appointment():
           type: object
           required:
             - local
-            - email
             - start_time
             - end_time
           properties:
@@ -34,7 +144,7 @@ def create_appointment():
             email:
               type: string
               example: joao@email.com
-              description: Email do usuário que está agendando
+              description: Email do usuário que está agendando (obrigatório sem token)
             start_time:
               type: string
               format: date-time
@@ -88,6 +198,14 @@ def create_appointment():
             error:
               type: string
               example: Campo obrigatório 'email' não informado
+      401:
+        description: Token de sessão inválido ou expirado
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Token inválido ou expirado
       404:
         description: Usuário, local ou carregador não encontrado
         schema:
@@ -96,6 +214,30 @@ def create_appointment():
             error:
               type: string
               example: Local não encontrado
+      409:
+        description: Todos os carregadores do local estão ocupados no horário solicitado
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Nenhum carregador livre neste local para o horário solicitado
+      202:
+        description: Com APPOINTMENT_WRITE_BATCHING, a gravação começou mas não terminou dentro do timeout; o resultado é desconhecido
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+              example: Agendamento em processamento; confira seus agendamentos antes de repetir a requisição
+      503:
+        description: Com APPOINTMENT_WRITE_BATCHING, a fila de gravação não andou dentro do timeout; nada foi gravado
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Servidor ocupado gravando agendamentos, tente novamente em instantes
       500:
         description: Erro interno ao criar o agendamento
         schema:
@@ -108,25 +250,34 @@ def create_appointment():
     try:
         data = request.json
 
+        # Com um token de sessão válido o usuário já está identificado
+        try:
+            identity = token_identity()
+        except InvalidToken as e:
+            return jsonify({"error": str(e)}), 401
+
         # Validar se todos os campos obrigatórios foram enviados
-        required_fields = ["local", "email", "start_time", "end_time"]
+        required_fields = ["local", "start_time", "end_time"] if identity else ["local", "email", "start_time", "end_time"]
         for field in required_fields:
             if field not in data or not data[field]:
                 return jsonify({"error": f"Campo obrigatório '{field}' não informado"}), 400
 
-        # Buscar o usuário pelo email
-        user = User.query.filter_by(email=data["email"]).first()
-        if not user:
-            return jsonify({"error": "Usuário não encontrado"}), 404
+        if identity:
+            user_id, email = identity
+        else:
+            # Buscar o usuário pelo email
+            email = data["email"]
+            user_id = _resolve_user_id(email)
+            if user_id is None:
+                return jsonify({"error": "Usuário não encontrado"}), 404
 
-        # Buscar o local pelo nome
-        location = Location.query.filter_by(name=data["local"]).first()
-        if not location:
+        # Buscar o local pelo nome e os carregadores (chargers) associados a ele
+        location = _resolve_location(data["local"])
+        if location is None:
             return jsonify({"error": "Local não encontrado"}), 404
-
-        # Buscar um carregador (charger) associado a esse local
-        charger = Charger.query.filter_by(location_id=location.id).first()
-        if not charger:
+        location_name = data["local"]
+        location_id, charger_ids = location
+        if not charger_ids:
             return jsonify({"error": "Nenhum carregador disponível neste local"}), 404
 
         # Converter datas
@@ -140,38 +291,296 @@ def create_appointment():
         if end_time <= start_time:
             return jsonify({"error": "O horário de término deve ser maior que o de início"}), 400
 
-        # Criar o agendamento
-        new_appointment = Appointment(
-            user_id=user.id,
-            charger_id=charger.id,
-            start_time=start_time,
-            end_time=end_time,
-            status="confirmed"
-        )
+        # Reservar o primeiro carregador livre e gravar o agendamento
+        if current_app.config.get("APPOINTMENT_WRITE_BATCHING"):
+            writer = get_writer(
+                current_app._get_current_object(),
+                "appointments",
+                max_batch=current_app.config["APPOINTMENT_BATCH_MAX_SIZE"],
+                max_wait=current_app.config["APPOINTMENT_BATCH_MAX_WAIT_MS"] / 1000,
+            )
+            future = writer.submit(
+                _book_appointment, user_id, charger_ids, start_time, end_time,
+                after_commit=_appointment_committed,
+                after_rollback=_appointment_rolled_back,
+            )
+            try:
+                booked = future.result(timeout=current_app.config["APPOINTMENT_BATCH_TIMEOUT"])
+            except FutureTimeoutError:
+                # Ainda na fila: cancelado, nada foi gravado e a requisição pode ser repetida
+                if future.cancel():
+                    return jsonify({"error": "Servidor ocupado gravando agendamentos, tente novamente em instantes"}), \
+                        503, {"Retry-After": "1"}
+                # Já em gravação: o resultado ainda não é conhecido
+                return jsonify({
+                    "message": "Agendamento em processamento; confira seus agendamentos antes de repetir a requisição"
+                }), 202
+        else:
+            new_appointment = _book_appointment(user_id, charger_ids, start_time, end_time)
+            booked = None
+            if new_appointment is not None:
+                try:
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    _appointment_rolled_back(new_appointment)
+                    raise
+                booked = _appointment_committed(new_appointment)
 
-        db.session.add(new_appointment)
-        db.session.commit()
+        if booked is None:
+            return jsonify({"error": "Nenhum carregador livre neste local para o horário solicitado"}), 409
 
         return jsonify({
             "message": "Agendamento criado com sucesso!",
             "appointment": {
-                "id": new_appointment.id,
-                "user": user.email,
-                "local": location.name,
-                "charger_id": charger.id,
-                "start_time": new_appointment.start_time.isoformat(),
-                "end_time": new_appointment.end_time.isoformat(),
-                "status": new_appointment.status
+                "user": email,
+                "local": location_name,
+                **booked
             }
         }), 201
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+@appointment_bp.route("/batch", methods=["POST"])
+def create_appointments_batch():
+    """
+    Cria vários agendamentos em uma única transação
+    ---
+    tags:
+      - Agendamentos
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            required:
+              - local
+              - email
+              - start_time
+              - end_time
+            properties:
+              local:
+                type: string
+                example: Estacionamento x
+              email:
+                type: string
+                example: joao@email.com
+              start_time:
+                type: string
+                format: date-time
+                example: 2025-04-03T12:00
+              end_time:
+                type: string
+                format: date-time
+                example: 2025-04-03T16:00
+    responses:
+      201:
+        description: Todos os agendamentos foram criados
+        schema:
+          type: object
+          properties:
+            created:
+              type: integer
+              example: 2
+            failed:
+              type: integer
+              example: 0
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  index:
+                    type: integer
+                    example: 0
+                  status:
+                    type: integer
+                    example: 201
+                  appointment:
+                    type: object
+                  error:
+                    type: string
+      207:
+        description: Parte dos agendamentos falhou; o status e o erro de cada item estão em results
+      400:
+        description: Corpo da requisição inválido
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Envie uma lista de agendamentos
+      500:
+        description: Erro interno; nenhum agendamento do lote foi gravado
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Erro inesperado ao processar a requisição
+    """
+    reserved = []
+    try:
+        items = request.json
+        if isinstance(items, dict):
+            items = items.get("appointments")
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "Envie uma lista de agendamentos"}), 400
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"O lote deve ter no máximo {MAX_BATCH_SIZE} agendamentos"}), 400
+
+        results = [None] * len(items)
+
+        # Validar campos e datas de cada item
+        valid = []
+        required_fields = ["local", "email", "start_time", "end_time"]
+        for i, data in enumerate(items):
+            if not isinstance(data, dict):
+                results[i] = {"index": i, "status": 400, "error": "Agendamento inválido"}
+                continue
+            missing = next((f for f in required_fields if not data.get(f)), None)
+            if missing:
+                results[i] = {"index": i, "status": 400, "error": f"Campo obrigatório '{missing}' não informado"}
+                continue
+            try:
+                start_time = parse_iso_datetime(data["start_time"])
+                end_time = parse_iso_datetime(data["end_time"])
+            except (ValueError, TypeError):
+                results[i] = {"index": i, "status": 400, "error": "Formato de data inválido. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS)"}
+                continue
+            if end_time <= start_time:
+                results[i] = {"index": i, "status": 400, "error": "O horário de término deve ser maior que o de início"}
+                continue
+            valid.append((i, data["email"], data["local"], start_time, end_time))
+
+        # Resolver usuários, locais e carregadores pelo cache de identidade e,
+        # para o que faltar, com uma consulta IN cada
+        emails = {email for _, email, _, _, _ in valid}
+        names = {name for _, _, name, _, _ in valid}
+
+        users = {email: user_ids_by_email.get(email) for email in emails}
+        missing_emails = [email for email, uid in users.items() if uid is None]
+        if missing_emails:
+            for email, uid in db.session.query(User.email, User.id).filter(User.email.in_(missing_emails)):
+                users[email] = uid
+                user_ids_by_email.set(email, uid)
+
+        locations = {name: locations_by_name.get(name) for name in names}
+        missing_names = [name for name, loc in locations.items() if loc is None]
+        if missing_names:
+            found = dict(db.session.query(Location.name, Location.id).filter(Location.name.in_(missing_names)))
+            chargers_by_location = {lid: [] for lid in found.values()}
+            if found:
+                for charger_id, location_id in db.session.query(Charger.id, Charger.location_id) \
+                        .filter(Charger.location_id.in_(found.values())).order_by(Charger.id):
+                    chargers_by_location[location_id].append(charger_id)
+            for name, location_id in found.items():
+                locations[name] = (location_id, tuple(chargers_by_location[location_id]))
+                locations_by_name.set(name, locations[name])
+
+        appointment_index.load_many([cid for loc in locations.values() if loc for cid in loc[1]])
+
+        # Reservar no índice: detecta conflitos com o banco e dentro do próprio lote.
+        # O lock de escrita é tomado antes para que a confirmação no banco valha até o commit
+        begin_immediate(db.session)
+        rows = []
+        for i, email, name, start_time, end_time in valid:
+            if users[email] is None:
+                results[i] = {"index": i, "status": 404, "error": "Usuário não encontrado"}
+                continue
+            if locations[name] is None:
+                results[i] = {"index": i, "status": 404, "error": "Local não encontrado"}
+                continue
+            charger_ids = locations[name][1]
+            if not charger_ids:
+                results[i] = {"index": i, "status": 404, "error": "Nenhum carregador disponível neste local"}
+                continue
+            charger_id = _reserve_charger(charger_ids, start_time, end_time)
+            if charger_id is None:
+                results[i] = {"index": i, "status": 409, "error": "Nenhum carregador livre neste local para o horário solicitado"}
+                continue
+            reserved.append((i, email, name, charger_id, start_time, end_time))
+            rows.append({
+                "user_id": users[email],
+                "charger_id": charger_id,
+                "start_time": start_time,
+                "end_time": end_time,
+                "status": "confirmed"
+            })
+
+        # Inserir todos os agendamentos válidos em uma única transação
+        if rows:
+            ids = insert_returning_ids(db.session, Appointment, rows)
+            record_usage(db.session, [(r["charger_id"], r["start_time"], r["end_time"]) for r in rows])
+            db.session.commit()
+            committed, reserved = reserved, []
+
+            for (i, email, name, charger_id, start_time, end_time), appointment_id in zip(committed, ids):
+                appointment_index.assign(charger_id, start_time, appointment_id)
+                results[i] = {"index": i, "status": 201, "appointment": {
+                    "id": appointment_id,
+                    "user": email,
+                    "local": name,
+                    "charger_id": charger_id,
+                    "start_time": start_time.isoformat(),
+                    "end_time": end_time.isoformat(),
+                    "status": "confirmed"
+                }}
+
+        created = len(rows)
+        return jsonify({
+            "created": created,
+            "failed": len(items) - created,
+            "results": results
+        }), 201 if created == len(items) else 207
+
+    except Exception as e:
+        db.session.rollback()
+        for _, _, _, charger_id, start_time, _ in reserved:
+            appointment_index.release(charger_id, start_time)
+        return jsonify({"error": str(e)}), 500
+
+def _serialize_appointment(ap):
+    return {
+        "id": ap.id,
+        "local": ap.name if ap.name is not None else "Desconhecido",
+        "endereco": ap.address if ap.address is not None else "Desconhecido",
+        "start_time": ap.start_time.isoformat(),
+        "end_time": ap.end_time.isoformat(),
+        "status": ap.status
+    }
+
+def _user_appointments_select(model, user_id, status, date_from, date_to, after):
+    """ SELECT dos agendamentos de um usuário em `model` (Appointment ou AppointmentArchive) """
+    query = select(
+        model.id,
+        model.start_time,
+        model.end_time,
+        model.status,
+        Location.name,
+        Location.address,
+    ).outerjoin(Charger, Charger.id == model.charger_id) \
+        .outerjoin(Location, Location.id == Charger.location_id) \
+        .where(model.user_id == user_id)
+
+    if status:
+        query = query.where(model.status == status)
+    if date_from:
+        query = query.where(model.end_time > date_from)
+    if date_to:
+        query = query.where(model.start_time < date_to)
+    if after:
+        query = query.where(tuple_(model.start_time, model.id) > after)
+    return query
+
 @appointment_bp.route("/<int:user_id>", methods=["GET"])
 def get_user_appointments(user_id):
     """
-    Retorna todos os agendamentos de um usuário
+    Retorna os agendamentos de um usuário, paginados por (start_time, id)
     ---
     tags:
       - Agendamentos
@@ -182,9 +591,55 @@ def get_user_appointments(user_id):
         required: true
         description: ID do usuário
         example: 2
+      - name: Authorization
+        in: header
+        type: string
+        required: false
+        description: "Bearer <token> obtido no login"
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de agendamentos por página (padrão 100, máximo 500). Sem limit e sem after a lista completa é retornada, sem paginação
+        example: 50
+      - name: after
+        in: query
+        type: string
+        required: false
+        description: Cursor retornado no cabeçalho X-Next-Cursor da página anterior
+      - name: status
+        in: query
+        type: string
+        required: false
+        description: Filtra pelo status do agendamento
+        example: confirmed
+      - name: from
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: Retorna apenas agendamentos que terminam depois desta data
+        example: 2025-04-01T00:00
+      - name: to
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: Retorna apenas agendamentos que começam antes desta data
+        example: 2025-04-30T23:59
+      - name: stream
+        in: query
+        type: boolean
+        required: false
+        description: Envia todos os agendamentos após o cursor em streaming, sem aplicar limit
+      - name: include_history
+        in: query
+        type: boolean
+        required: false
+        description: Inclui os agendamentos já movidos para o arquivo histórico
     responses:
       200:
-        description: Lista de agendamentos do usuário
+        description: Lista de agendamentos do usuário. Quando houver mais resultados, o cabeçalho X-Next-Cursor traz o cursor da próxima página
         schema:
           type: array
           items:
@@ -210,6 +665,18 @@ def get_user_appointments(user_id):
               status:
                 type: string
                 example: confirmado
+      400:
+        description: Parâmetros de paginação ou filtro inválidos
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Cursor de paginação inválido
+      401:
+        description: Token de sessão inválido ou expirado
+      403:
+        description: O token pertence a outro usuário
       404:
         description: Usuário não encontrado
         schema:
@@ -228,34 +695,66 @@ def get_user_appointments(user_id):
               example: Ocorreu um erro ao buscar os agendamentos
     """
     try:
-        # Verifica se o usuário existe
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({"error": "Usuário não encontrado"}), 404
+        # Com token de sessão, o próprio token garante que o usuário existe
+        try:
+            identity = token_identity()
+        except InvalidToken as e:
+            return jsonify({"error": str(e)}), 401
 
-        # Busca os agendamentos do usuário
-        appointments = Appointment.query.filter_by(user_id=user_id).all()
+        if identity:
+            if identity[0] != user_id:
+                return jsonify({"error": "O token não pertence a este usuário"}), 403
+        else:
+            # Verifica se o usuário existe
+            user = User.query.get(user_id)
+            if not user:
+                return jsonify({"error": "Usuário não encontrado"}), 404
 
-        # Se não houver agendamentos, retorna uma lista vazia
-        if not appointments:
-            return jsonify([]), 200
+        # Parâmetros de paginação e filtros
+        try:
+            limit = parse_limit(request.args.get("limit"), DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+            after = None
+            if request.args.get("after"):
+                after_start, after_id = decode_cursor(request.args["after"])
+                after = (parse_iso_datetime(after_start), int(after_id))
+            date_from = parse_iso_datetime(request.args["from"]) if request.args.get("from") else None
+            date_to = parse_iso_datetime(request.args["to"]) if request.args.get("to") else None
+        except (ValueError, TypeError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        status = request.args.get("status")
+        if status and status not in STATUSES:
+            return jsonify({"error": f"Status inválido. Use um de: {', '.join(STATUSES)}"}), 400
+
+        # Busca os agendamentos com local e endereço em uma única consulta
+        filters = (status, date_from, date_to, after)
+        query = _user_appointments_select(Appointment, user_id, *filters)
+        if request.args.get("include_history", "").lower() in ("1", "true"):
+            # Os filtros e o cursor são aplicados em cada tabela antes da união
+            merged = union_all(query, _user_appointments_select(AppointmentArchive, user_id, *filters)).subquery()
+            query = select(merged).order_by(merged.c.start_time, merged.c.id)
+        else:
+            query = query.order_by(Appointment.start_time, Appointment.id)
+
+        # Sem limit/after a resposta é a lista completa, como antes da paginação;
+        # ela é enviada em streaming para não montar tudo em memória
+        paginated = bool(request.args.get("limit") or request.args.get("after"))
+        if wants_stream() or not paginated:
+            rows = db.session.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+            return json_array_response(_serialize_appointment(ap) for ap in rows)
+
+        rows = db.session.execute(query.limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
 
         # Monta a resposta
-        response = []
-        for ap in appointments:
-            charger = Charger.query.get(ap.charger_id)
-            location = Location.query.get(charger.location_id) if charger else None
-
-            response.append({
-                "id": ap.id,
-                "local": location.name if location else "Desconhecido",
-                "endereco": location.address if location else "Desconhecido",
-                "start_time": ap.start_time.isoformat(),
-                "end_time": ap.end_time.isoformat(),
-                "status": ap.status
-            })
+        response = [_serialize_appointment(ap) for ap in rows]
 
-        return jsonify(response), 200
+        headers = {}
+        if has_more:
+            headers["X-Next-Cursor"] = encode_cursor(rows[-1].start_time, rows[-1].id)
+
+        return jsonify(response), 200, headers
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -309,9 +808,15 @@ def delete_appointment(appointment_id):
             return jsonify({"error": "Agendamento não encontrado"}), 404
 
         # Remover o agendamento do banco de dados
+        charger_id, start_time = appointment.charger_id, appointment.start_time
+        if appointment.status != "canceled":
+            record_usage(db.session, [(charger_id, start_time, appointment.end_time)], sign=-1)
         db.session.delete(appointment)
         db.session.commit()
 
+        # Liberar o horário no índice de carregadores
+        appointment_index.release(charger_id, start_time, appointment_id)
+
         return jsonify({"message": "Agendamento excluído com sucesso"}), 200
 
     except Exception as e:
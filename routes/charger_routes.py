@@ -1,16 +1,100 @@
-from flask import Blueprint, request, jsonify
+import json
+import queue
+from flask import Blueprint, Response, request, jsonify
+from sqlalchemy import update
 from models import db
-from models.charger import Charger
+from models.charger import Charger, STATUSES
+from models.location import Location
+from utils.cache import locations_by_name, response_cache, not_modified
+from utils.bulk_insert import insert_returning_ids
+from utils.pagination import encode_cursor, decode_cursor, parse_limit
+from utils.pubsub import charger_events
+from utils.streaming import STREAM_BATCH_SIZE, json_array_response, wants_stream
 
 charger_bp = Blueprint('charger_bp', __name__)
 
+# Quantidade máxima de itens por requisição nas rotas em lote
+MAX_BULK_SIZE = 5000
+
+# Intervalo, em segundos, entre comentários de keep-alive no stream SSE
+STREAM_KEEPALIVE = 15
+
+# Colunas que podem ser pedidas em ?fields= na listagem
+CHARGER_FIELDS = {
+    'id': Charger.id,
+    'location_id': Charger.location_id,
+    'status': Charger.status,
+    'created_at': Charger.created_at,
+}
+DEFAULT_FIELDS = ('id', 'location_id', 'status')
+
+# Tamanho máximo de página na listagem de carregadores
+MAX_PAGE_SIZE = 1000
+
+def _multi_arg(name):
+    """ Lê um parâmetro que pode ser repetido ou separado por vírgulas """
+    return [v.strip() for raw in request.args.getlist(name) for v in raw.split(',') if v.strip()]
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+def _chargers_changed(changes):
+    """
+    Chamado após o commit de qualquer escrita em carregadores: publica as
+    alterações (id, location_id, status) para os clientes do stream SSE. As
+    listagens em cache e o índice espacial são invalidados pelos triggers de
+    table_version.
+    """
+    if changes:
+        charger_events.publish(_sse('charger', changes))
+
 @charger_bp.route('/', methods=['GET'])
 def get_chargers():
     """
-    Lista todos os carregadores disponíveis
+    Lista os carregadores, com filtros, paginação por id e projeção de campos
     ---
     tags:
       - Carregadores
+    parameters:
+      - name: status
+        in: query
+        type: string
+        required: false
+        description: Filtra por status (pode repetir ou separar por vírgulas)
+        example: available
+      - name: location_id
+        in: query
+        type: string
+        required: false
+        description: Filtra por localização (pode repetir ou separar por vírgulas)
+        example: 1,3
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Campos retornados, entre id, location_id, status e created_at
+        example: id,status
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Tamanho da página (máximo 1000). Sem limit, retorna todos
+        example: 100
+      - name: after
+        in: query
+        type: string
+        required: false
+        description: Cursor retornado no cabeçalho X-Next-Cursor da página anterior
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag recebida anteriormente; responde 304 se nada mudou
+      - name: stream
+        in: query
+        type: boolean
+        required: false
+        description: Envia o array JSON em streaming, lendo o banco com cursor
     responses:
       200:
         description: Lista de carregadores cadastrados
@@ -28,9 +112,74 @@ def get_chargers():
               status:
                 type: string
                 example: available
+      304:
+        description: A lista não mudou desde a ETag informada
+      400:
+        description: Filtro, campo ou cursor inválido
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Status inválido. Use um de available, unavailable, maintenance
     """
-    chargers = Charger.query.all()
-    return jsonify([{'id': ch.id, 'location_id': ch.location_id, 'status': ch.status} for ch in chargers])
+    etag = response_cache.etag(response_cache.generation('charger'))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    # Filtros, paginação e projeção de colunas
+    try:
+        fields = _multi_arg('fields') or list(DEFAULT_FIELDS)
+        unknown = [f for f in fields if f not in CHARGER_FIELDS]
+        if unknown:
+            raise ValueError(f"Campos inválidos: {', '.join(unknown)}. Use: {', '.join(CHARGER_FIELDS)}")
+
+        statuses = _multi_arg('status')
+        invalid = [st for st in statuses if st not in STATUSES]
+        if invalid:
+            raise ValueError(f"Status inválido. Use um de: {', '.join(STATUSES)}")
+
+        location_ids = _multi_arg('location_id')
+        if not all(lid.isdigit() for lid in location_ids):
+            raise ValueError("O parâmetro location_id deve conter apenas ids numéricos")
+        location_ids = [int(lid) for lid in location_ids]
+        limit = parse_limit(request.args.get('limit'), None, MAX_PAGE_SIZE)
+        after = int(decode_cursor(request.args['after'])[0]) if request.args.get('after') else None
+    except (ValueError, TypeError, IndexError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Seleciona apenas as colunas pedidas (mais o id, usado no cursor)
+    columns = [CHARGER_FIELDS[f] for f in fields]
+    if 'id' not in fields:
+        columns.append(Charger.id)
+    query = db.session.query(*columns)
+
+    if statuses:
+        query = query.filter(Charger.status.in_(statuses))
+    if location_ids:
+        query = query.filter(Charger.location_id.in_(location_ids))
+    if after is not None:
+        query = query.filter(Charger.id > after)
+    query = query.order_by(Charger.id)
+
+    def serialize(row):
+        return {f: (v.isoformat() if f == 'created_at' and v is not None else v)
+                for f, v in zip(fields, row)}
+
+    if wants_stream():
+        if limit:
+            query = query.limit(limit)
+        response = json_array_response(serialize(row) for row in query.yield_per(STREAM_BATCH_SIZE))
+    elif limit:
+        rows = query.limit(limit + 1).all()
+        response = jsonify([serialize(row) for row in rows[:limit]])
+        if len(rows) > limit:
+            response.headers['X-Next-Cursor'] = encode_cursor(rows[limit - 1].id)
+    else:
+        response = jsonify([serialize(row) for row in query])
+    response.set_etag(etag)
+    return response
 
 @charger_bp.route('/', methods=['POST'])
 def create_charger():
@@ -81,4 +230,245 @@ def create_charger():
     )
     db.session.add(new_charger)
     db.session.commit()
+    locations_by_name.clear()
+    _chargers_changed([{'id': new_charger.id, 'location_id': new_charger.location_id, 'status': new_charger.status}])
     return jsonify({'message': 'Carregador criado com sucesso!'}), 201
+
+def _bulk_items(data):
+    """ Valida o corpo das rotas em lote, que deve ser uma lista não vazia """
+    if not isinstance(data, list) or not data:
+        return None, "Envie uma lista de carregadores"
+    if len(data) > MAX_BULK_SIZE:
+        return None, f"O lote deve ter no máximo {MAX_BULK_SIZE} carregadores"
+    if not all(isinstance(item, dict) for item in data):
+        return None, "Cada item do lote deve ser um objeto"
+    return data, None
+
+@charger_bp.route('/bulk', methods=['POST'])
+def create_chargers_bulk():
+    """
+    Cadastra vários carregadores em uma única transação
+    ---
+    tags:
+      - Carregadores
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            required:
+              - location_id
+            properties:
+              location_id:
+                type: integer
+                example: 3
+              status:
+                type: string
+                example: available
+    responses:
+      201:
+        description: Carregadores criados com sucesso
+        schema:
+          type: object
+          properties:
+            created:
+              type: integer
+              example: 2
+            ids:
+              type: array
+              items:
+                type: integer
+              example: [10, 11]
+      400:
+        description: Lote inválido; nenhum carregador foi criado
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Lote inválido
+            details:
+              type: array
+              items:
+                type: object
+    """
+    items, error = _bulk_items(request.json)
+    if error:
+        return jsonify({'error': error}), 400
+
+    # Validar todos os itens antes de gravar qualquer um
+    details = []
+    rows = []
+    for i, item in enumerate(items):
+        location_id = item.get('location_id')
+        status = item.get('status', 'available')
+        if not isinstance(location_id, int) or isinstance(location_id, bool):
+            details.append({'index': i, 'error': 'O campo location_id é obrigatório'})
+        elif status not in STATUSES:
+            details.append({'index': i, 'error': f"Status inválido. Use um de: {', '.join(STATUSES)}"})
+        else:
+            rows.append({'location_id': location_id, 'status': status})
+
+    location_ids = {row['location_id'] for row in rows}
+    existing = {lid for (lid,) in db.session.query(Location.id).filter(Location.id.in_(location_ids))}
+    for i, item in enumerate(items):
+        if item.get('location_id') in location_ids - existing:
+            details.append({'index': i, 'error': 'Local não encontrado'})
+
+    if details:
+        return jsonify({'error': 'Lote inválido', 'details': sorted(details, key=lambda d: d['index'])}), 400
+
+    ids = insert_returning_ids(db.session, Charger, rows)
+    db.session.commit()
+    locations_by_name.clear()
+    _chargers_changed([{'id': cid, **row} for cid, row in zip(ids, rows)])
+
+    return jsonify({'created': len(ids), 'ids': ids}), 201
+
+@charger_bp.route('/status', methods=['PATCH'])
+def update_chargers_status():
+    """
+    Atualiza o status de vários carregadores em uma única transação
+    ---
+    tags:
+      - Carregadores
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            required:
+              - id
+              - status
+            properties:
+              id:
+                type: integer
+                example: 5
+              status:
+                type: string
+                example: maintenance
+    responses:
+      200:
+        description: Status atualizados com sucesso
+        schema:
+          type: object
+          properties:
+            updated:
+              type: integer
+              example: 2
+      400:
+        description: Lote inválido; nenhum status foi alterado
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Lote inválido
+            details:
+              type: array
+              items:
+                type: object
+      404:
+        description: Algum carregador não existe; nenhum status foi alterado
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Carregadores não encontrados
+            ids:
+              type: array
+              items:
+                type: integer
+    """
+    items, error = _bulk_items(request.json)
+    if error:
+        return jsonify({'error': error}), 400
+
+    # Validar todos os itens antes de gravar; em ids repetidos vale o último
+    details = []
+    changes = {}
+    for i, item in enumerate(items):
+        charger_id = item.get('id')
+        status = item.get('status')
+        if not isinstance(charger_id, int) or isinstance(charger_id, bool):
+            details.append({'index': i, 'error': 'O campo id é obrigatório'})
+        elif status not in STATUSES:
+            details.append({'index': i, 'error': f"Status inválido. Use um de: {', '.join(STATUSES)}"})
+        else:
+            changes[charger_id] = status
+
+    if details:
+        return jsonify({'error': 'Lote inválido', 'details': details}), 400
+
+    current = {
+        cid: (location_id, status) for cid, location_id, status in
+        db.session.query(Charger.id, Charger.location_id, Charger.status).filter(Charger.id.in_(changes))
+    }
+    missing = sorted(set(changes) - set(current))
+    if missing:
+        return jsonify({'error': 'Carregadores não encontrados', 'ids': missing}), 404
+
+    # Só grava o que de fato mudou
+    rows = [{'id': cid, 'status': status} for cid, status in changes.items() if current[cid][1] != status]
+    if rows:
+        db.session.execute(update(Charger), rows)
+        db.session.commit()
+        _chargers_changed([
+            {'id': row['id'], 'location_id': current[row['id']][0], 'status': row['status']}
+            for row in rows
+        ])
+
+    return jsonify({'updated': len(rows)}), 200
+
+@charger_bp.route('/stream', methods=['GET'])
+def stream_chargers():
+    """
+    Stream (Server-Sent Events) do estado dos carregadores
+    ---
+    tags:
+      - Carregadores
+    produces:
+      - text/event-stream
+    responses:
+      200:
+        description: |
+          O primeiro evento (`snapshot`) traz a lista completa de carregadores.
+          Depois, cada evento `charger` traz apenas os carregadores criados ou com
+          status alterado, no formato [{"id", "location_id", "status"}].
+          Se o cliente não acompanhar o ritmo das alterações, o stream é encerrado
+          e o EventSource reconecta recebendo um novo snapshot.
+    """
+    # Inscreve antes de ler o snapshot para não perder alterações no intervalo
+    subscription = charger_events.subscribe()
+    try:
+        snapshot = [
+            {'id': cid, 'location_id': location_id, 'status': status}
+            for cid, location_id, status in
+            db.session.query(Charger.id, Charger.location_id, Charger.status).order_by(Charger.id)
+        ]
+    except Exception:
+        charger_events.unsubscribe(subscription)
+        raise
+
+    def generate():
+        try:
+            yield _sse('snapshot', snapshot)
+            while not subscription.lagged:
+                try:
+                    yield subscription.get(timeout=STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            charger_events.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
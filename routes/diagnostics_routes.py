@@ -0,0 +1,75 @@
+from flask import Blueprint, jsonify, current_app
+from models import db
+from models.pragmas import effective_sqlite_pragmas
+from utils.cache import locations_by_name, response_cache, user_ids_by_email
+
+diagnostics_bp = Blueprint('diagnostics_bp', __name__)
+
+# PRAGMAs sempre reportados, mesmo quando o perfil não os altera
+REPORTED_PRAGMAS = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout")
+
+@diagnostics_bp.route('/db', methods=['GET'])
+def get_db_diagnostics():
+    """
+    Exibe as configurações efetivas do banco de dados
+    ---
+    tags:
+      - Diagnóstico
+    responses:
+      200:
+        description: Perfil ativo, PRAGMAs efetivos do SQLite e estado do pool de conexões
+        schema:
+          type: object
+          properties:
+            config:
+              type: string
+              example: production
+            dialect:
+              type: string
+              example: sqlite
+            pragmas:
+              type: object
+              example: {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000}
+            engine_options:
+              type: object
+              example: {"pool_size": 10, "max_overflow": 20}
+            pool:
+              type: string
+              example: "Pool size: 10  Connections in pool: 1 Current Overflow: -9 Current Checked out connections: 0"
+    """
+    engine = db.engine
+    configured = current_app.config.get("SQLITE_PRAGMAS") or {}
+    names = list(dict.fromkeys([*REPORTED_PRAGMAS, *configured]))
+
+    engine_options = dict(current_app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    engine_options.pop("creator", None)
+
+    return jsonify({
+        "config": current_app.config.get("CONFIG_NAME"),
+        "dialect": engine.dialect.name,
+        "pragmas": effective_sqlite_pragmas(names),
+        "engine_options": engine_options,
+        "pool": engine.pool.status(),
+    })
+
+@diagnostics_bp.route('/cache', methods=['GET'])
+def get_cache_diagnostics():
+    """
+    Exibe o tamanho e os acertos/erros dos caches em memória do processo
+    ---
+    tags:
+      - Diagnóstico
+    responses:
+      200:
+        description: Estatísticas por cache
+        schema:
+          type: object
+          example: {"responses": {"entries": 1, "hits": 40, "misses": 2},
+                    "users_by_email": {"entries": 12, "hits": 300, "misses": 12},
+                    "locations_by_name": {"entries": 8, "hits": 310, "misses": 8}}
+    """
+    return jsonify({
+        "responses": response_cache.stats(),
+        "users_by_email": user_ids_by_email.stats(),
+        "locations_by_name": locations_by_name.stats(),
+    })
@@ -1,10 +1,36 @@
-from flask import Blueprint, request, jsonify
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, current_app
 from models import db
 from models.location import Location
-from models.charger import Charger
+from models.charger import Charger, STATUSES
+from utils.cache import response_cache, not_modified
+from utils.datetime_utils import parse_iso_datetime
+from utils.geo_index import location_geo_index
+from utils.interval_index import appointment_index
+from utils.streaming import STREAM_BATCH_SIZE, json_array_response, wants_stream
 
 location_bp = Blueprint('location_bp', __name__)
 
+def _group_locations(rows):
+    """ Agrupa as linhas (local, carregador), ordenadas por local, um local por vez """
+    current = None
+    for loc_id, name, address, latitude, longitude, charger_id, charger_status in rows:
+        if current is None or current['id'] != loc_id:
+            if current is not None:
+                yield current
+            current = {
+                'id': loc_id,
+                'name': name,
+                'address': address,
+                'latitude': latitude,
+                'longitude': longitude,
+                'chargers': []
+            }
+        if charger_id is not None:
+            current['chargers'].append({'id': charger_id, 'status': charger_status})
+    if current is not None:
+        yield current
+
 @location_bp.route('/locations_with_chargers', methods=['GET'])
 def get_all_locations_with_chargers():
     """
@@ -12,6 +38,17 @@ def get_all_locations_with_chargers():
     ---
     tags:
       - Localizações
+    parameters:
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag recebida anteriormente; responde 304 se nada mudou
+      - name: stream
+        in: query
+        type: boolean
+        required: false
+        description: Envia o array JSON em streaming, lendo o banco com cursor
     responses:
       200:
         description: Lista de localizações com carregadores
@@ -29,6 +66,12 @@ def get_all_locations_with_chargers():
               address:
                 type: string
                 example: Av. Pastor Martin Luther King Jr., 126 - RJ
+              latitude:
+                type: number
+                example: -22.8794
+              longitude:
+                type: number
+                example: -43.2716
               chargers:
                 type: array
                 items:
@@ -40,17 +83,300 @@ def get_all_locations_with_chargers():
                     status:
                       type: string
                       example: available
+      304:
+        description: A lista não mudou desde a ETag informada
+    """
+    generation = response_cache.generation('location', 'charger')
+    etag = response_cache.etag(generation)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    body = response_cache.get('locations_with_chargers', generation)
+    if body is None:
+        # Uma única consulta com join pelo relacionamento Location.chargers
+        rows = db.session.query(
+            Location.id, Location.name, Location.address, Location.latitude, Location.longitude,
+            Charger.id, Charger.status
+        ).outerjoin(Location.chargers).order_by(Location.id, Charger.id)
+
+        if wants_stream():
+            response = json_array_response(_group_locations(rows.yield_per(STREAM_BATCH_SIZE)))
+            response.set_etag(etag)
+            return response
+
+        body = current_app.json.dumps(list(_group_locations(rows)))
+        response_cache.set('locations_with_chargers', generation, body)
+
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+
+# Maior intervalo aceito na busca de disponibilidade
+MAX_AVAILABILITY_RANGE = timedelta(days=31)
+
+def _free_windows(busy, start, end, min_duration):
+    """ Percorre os intervalos ocupados (ordenados) e devolve as lacunas livres """
+    windows = []
+    cursor = start
+    for busy_start, busy_end, _ in busy:
+        if busy_start > cursor and busy_start - cursor >= min_duration:
+            windows.append((cursor, busy_start))
+        if busy_end > cursor:
+            cursor = busy_end
+    if end > cursor and end - cursor >= min_duration:
+        windows.append((cursor, end))
+    return windows
+
+@location_bp.route('/<int:location_id>/availability', methods=['GET'])
+def get_location_availability(location_id):
+    """
+    Lista as janelas livres de cada carregador de uma localização
+    ---
+    tags:
+      - Localizações
+    parameters:
+      - name: location_id
+        in: path
+        type: integer
+        required: true
+        description: ID da localização
+        example: 1
+      - name: from
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: Início do período (ISO 8601, padrão agora)
+        example: 2025-04-03T08:00
+      - name: to
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: Fim do período (ISO 8601, padrão início + 1 dia, máximo 31 dias)
+        example: 2025-04-03T20:00
+      - name: min_duration
+        in: query
+        type: integer
+        required: false
+        description: Duração mínima da janela livre, em minutos
+        example: 60
+    responses:
+      200:
+        description: Janelas livres por carregador
+        schema:
+          type: object
+          properties:
+            location_id:
+              type: integer
+              example: 1
+            from:
+              type: string
+              format: date-time
+              example: 2025-04-03T08:00:00
+            to:
+              type: string
+              format: date-time
+              example: 2025-04-03T20:00:00
+            chargers:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 5
+                  status:
+                    type: string
+                    example: available
+                  free:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        start_time:
+                          type: string
+                          format: date-time
+                          example: 2025-04-03T08:00:00
+                        end_time:
+                          type: string
+                          format: date-time
+                          example: 2025-04-03T12:00:00
+      400:
+        description: Parâmetros inválidos
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: O fim do período deve ser maior que o início
+      404:
+        description: Localização não encontrada
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Local não encontrado
     """
-    locations = Location.query.all()
-    
-    locations_data = []
-    for loc in locations:
-        chargers = Charger.query.filter_by(location_id=loc.id).all()
-        locations_data.append({
-            'id': loc.id,
-            'name': loc.name,
-            'address': loc.address,
-            'chargers': [{'id': ch.id, 'status': ch.status} for ch in chargers]
+    try:
+        start = parse_iso_datetime(request.args['from']) if request.args.get('from') else datetime.now()
+        end = parse_iso_datetime(request.args['to']) if request.args.get('to') else start + timedelta(days=1)
+    except ValueError:
+        return jsonify({"error": "Formato de data inválido. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS)"}), 400
+
+    try:
+        min_duration = timedelta(minutes=int(request.args.get('min_duration', 0)))
+    except ValueError:
+        return jsonify({"error": "O parâmetro min_duration deve ser um número inteiro de minutos"}), 400
+
+    if end <= start:
+        return jsonify({"error": "O fim do período deve ser maior que o início"}), 400
+    if end - start > MAX_AVAILABILITY_RANGE:
+        return jsonify({"error": "O período consultado deve ter no máximo 31 dias"}), 400
+
+    chargers = db.session.query(Charger.id, Charger.status) \
+        .filter_by(location_id=location_id) \
+        .order_by(Charger.id).all()
+    if not chargers and not db.session.query(Location.id).filter_by(id=location_id).first():
+        return jsonify({"error": "Local não encontrado"}), 404
+
+    # Carrega os intervalos de todos os carregadores do local em uma única consulta
+    appointment_index.load_many([ch.id for ch in chargers])
+
+    chargers_data = []
+    for ch in chargers:
+        busy = appointment_index.busy(ch.id, start, end)
+        chargers_data.append({
+            'id': ch.id,
+            'status': ch.status,
+            'free': [
+                {'start_time': free_start.isoformat(), 'end_time': free_end.isoformat()}
+                for free_start, free_end in _free_windows(busy, start, end, min_duration)
+            ]
         })
-    
-    return jsonify(locations_data)
\ No newline at end of file
+
+    return jsonify({
+        'location_id': location_id,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'chargers': chargers_data
+    })
+
+# Limites da busca por proximidade
+DEFAULT_NEARBY_RADIUS_KM = 5.0
+MAX_NEARBY_RADIUS_KM = 100.0
+DEFAULT_NEARBY_RESULTS = 10
+MAX_NEARBY_RESULTS = 100
+
+@location_bp.route('/nearby', methods=['GET'])
+def get_nearby_locations():
+    """
+    Lista as localizações mais próximas de um ponto
+    ---
+    tags:
+      - Localizações
+    parameters:
+      - name: lat
+        in: query
+        type: number
+        required: true
+        description: Latitude do ponto de referência
+        example: -22.8880
+      - name: lon
+        in: query
+        type: number
+        required: true
+        description: Longitude do ponto de referência
+        example: -43.2775
+      - name: radius
+        in: query
+        type: number
+        required: false
+        description: Raio máximo da busca, em km (padrão 5, máximo 100)
+        example: 5
+      - name: status
+        in: query
+        type: string
+        required: false
+        description: Retorna apenas localizações com carregadores neste status
+        example: available
+      - name: k
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de localizações (padrão 10, máximo 100)
+        example: 10
+    responses:
+      200:
+        description: Localizações ordenadas pela distância
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+                example: 8
+              name:
+                type: string
+                example: Estacionamento x
+              address:
+                type: string
+                example: Av. Dom Hélder Câmara, 0001 - Cachambi
+              latitude:
+                type: number
+                example: -22.8880
+              longitude:
+                type: number
+                example: -43.2775
+              distance_km:
+                type: number
+                example: 0.12
+              chargers:
+                type: integer
+                description: Quantidade de carregadores no status pedido (ou total, sem status)
+                example: 2
+      400:
+        description: Parâmetros inválidos
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Os parâmetros lat e lon são obrigatórios
+    """
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Os parâmetros lat e lon são obrigatórios e devem ser numéricos"}), 400
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        return jsonify({"error": "Coordenadas fora do intervalo válido"}), 400
+
+    try:
+        radius = float(request.args.get('radius', DEFAULT_NEARBY_RADIUS_KM))
+        k = int(request.args.get('k', DEFAULT_NEARBY_RESULTS))
+    except ValueError:
+        return jsonify({"error": "Os parâmetros radius e k devem ser numéricos"}), 400
+    if not 0 < radius <= MAX_NEARBY_RADIUS_KM:
+        return jsonify({"error": f"O raio deve estar entre 0 e {MAX_NEARBY_RADIUS_KM:g} km"}), 400
+    if not 1 <= k <= MAX_NEARBY_RESULTS:
+        return jsonify({"error": f"O parâmetro k deve estar entre 1 e {MAX_NEARBY_RESULTS}"}), 400
+
+    status = request.args.get('status')
+    if status and status not in STATUSES:
+        return jsonify({"error": f"Status inválido. Use um de: {', '.join(STATUSES)}"}), 400
+
+    results = location_geo_index.nearest(lat, lon, radius, k, status or None)
+    return jsonify([{
+        'id': location.id,
+        'name': location.name,
+        'address': location.address,
+        'latitude': location.lat,
+        'longitude': location.lon,
+        'distance_km': round(distance, 3),
+        'chargers': matching
+    } for distance, location, matching in results])
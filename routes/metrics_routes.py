@@ -0,0 +1,31 @@
+from flask import Blueprint, current_app
+from utils.cache import locations_by_name, response_cache, user_ids_by_email
+from utils.metrics import render_prometheus
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Exibe as métricas do processo no formato texto do Prometheus
+    ---
+    tags:
+      - Diagnóstico
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Histogramas de latência por rota, tempo de banco, comandos SQL, linhas gravadas e acertos dos caches
+        schema:
+          type: string
+          example: |
+            chargehub_http_request_duration_seconds_count{endpoint="/api/chargers/",method="GET",status="200"} 42
+            chargehub_db_statements_total{endpoint="/api/chargers/",method="GET",status="200"} 42
+            chargehub_cache_hit_ratio{cache="responses"} 0.95
+    """
+    body = render_prometheus({
+        "responses": response_cache,
+        "users_by_email": user_ids_by_email,
+        "locations_by_name": locations_by_name,
+    })
+    return current_app.response_class(body, mimetype="text/plain; version=0.0.4")
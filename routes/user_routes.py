@@ -1,11 +1,16 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash
-from werkzeug.security import check_password_hash
+from flask import Blueprint, request, jsonify, current_app
 from models import db
 from models.user import User
+from utils.auth import issue_token, needs_rehash
+from utils.cache import user_ids_by_email
+from utils.hashing import HashingOverloaded, get_hasher
 
 user_bp = Blueprint('user_bp', __name__)
 
+def _overloaded(error):
+    """ Resposta 503 quando o pool de hash de senhas está saturado ou indisponível """
+    return jsonify({'error': str(error)}), 503, {'Retry-After': str(error.retry_after)}
+
 @user_bp.route('/', methods=['POST'])
 def create_user():
     """
@@ -43,17 +48,29 @@ def create_user():
               type: string
             email:
               type: string
+      503:
+        description: Muitas senhas sendo processadas ou serviço de senhas indisponível; tente novamente após Retry-After segundos
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Servidor ocupado processando senhas, tente novamente em instantes
     """
     data = request.json
     
     # Gerar o hash da senha
-    hashed_password = generate_password_hash(data['password'])
+    try:
+        hashed_password = get_hasher().hash(data['password'], current_app.config['PASSWORD_HASH_METHOD'])
+    except HashingOverloaded as e:
+        return _overloaded(e)
     
     # Criar o novo usuário
     new_user = User(name=data['name'], email=data['email'], password_hash=hashed_password)
     
     db.session.add(new_user)
     db.session.commit()
+    user_ids_by_email.invalidate(new_user.email)
     
     return jsonify({
         'message': 'Usuário criado com sucesso!',
@@ -97,6 +114,12 @@ def login():
             email:
               type: string
               example: joao@email.com
+            token:
+              type: string
+              description: Token de sessão para o cabeçalho "Authorization Bearer"
+            expires_in:
+              type: integer
+              example: 3600
       400:
         description: Email e senha são obrigatórios
         schema:
@@ -121,8 +144,15 @@ def login():
             error:
               type: string
               example: Usuário não encontrado
+      503:
+        description: Muitas senhas sendo processadas ou serviço de senhas indisponível; tente novamente após Retry-After segundos
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: Servidor ocupado processando senhas, tente novamente em instantes
     """
-    print(request.json)
     data = request.json
     email = data.get('email')
     password = data.get('password')
@@ -131,20 +161,35 @@ def login():
     if not email or not password:
         return jsonify({'error': 'Email e senha são obrigatórios!'}), 400
 
-    # Procurar o usuário no banco de dados
-    user = User.query.filter_by(email=email).first()
+    # Procurar o usuário no banco de dados, pelo id em cache quando disponível
+    user_id = user_ids_by_email.get(email)
+    user = db.session.get(User, user_id) if user_id is not None else None
+    if user is None:
+        user = User.query.filter_by(email=email).first()
+        if user:
+            user_ids_by_email.set(email, user.id)
 
     # Verificar se o usuário existe
     if not user:
         return jsonify({'error': 'Usuário não encontrado'}), 404
 
-    # Verificar se a senha está correta
-    if not check_password_hash(user.password_hash, password):
-        return jsonify({'error': 'Senha incorreta'}), 401
+    try:
+        # Verificar se a senha está correta
+        if not get_hasher().verify(user.password_hash, password):
+            return jsonify({'error': 'Senha incorreta'}), 401
+
+        # Refazer o hash se ele foi gerado com parâmetros diferentes da política atual
+        if needs_rehash(user.password_hash):
+            user.password_hash = get_hasher().hash(password, current_app.config['PASSWORD_HASH_METHOD'])
+            db.session.commit()
+    except HashingOverloaded as e:
+        return _overloaded(e)
 
-    # Retornar as propriedades name, email e uma mensagem de sucesso
+    # Retornar as propriedades name, email e o token de sessão
     return jsonify({
         'id': user.id,  # Adicionamos o ID aqui
         'name': user.name,
         'email': user.email,
+        'token': issue_token(user.id, user.email),
+        'expires_in': current_app.config['AUTH_TOKEN_MAX_AGE'],
     })
\ No newline at end of file
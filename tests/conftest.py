@@ -0,0 +1,48 @@
+import pytest
+from app import create_app
+from cli import seed_database
+from config.config import Config
+from models import db
+from utils.cache import locations_by_name, user_ids_by_email
+from utils.geo_index import location_geo_index
+from utils.interval_index import appointment_index
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        CONFIG_NAME = "test"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        APIDOCS_ENABLED = False
+        PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+        PASSWORD_HASH_WORKERS = 0
+
+    # Os índices e caches são globais ao processo: cada teste começa vazio
+    for cache in (appointment_index, location_geo_index):
+        cache.invalidate()
+    for cache in (locations_by_name, user_ids_by_email):
+        cache.clear()
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        seed_database()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    response = client.post("/api/users/", json={"name": "Ana", "email": "ana@email.com", "password": "segredo"})
+    assert response.status_code == 201
+    return client
+
+
+def book(client, start_time, end_time, local="Shopping Center"):
+    return client.post("/api/appointments/", json={
+        "local": local,
+        "email": "ana@email.com",
+        "start_time": start_time,
+        "end_time": end_time,
+    })
@@ -0,0 +1,67 @@
+import sqlite3
+from sqlalchemy.exc import OperationalError
+import routes.appointment_routes as appointment_routes
+from models import db
+from models.appointment import Appointment
+from models.archival import archive_appointments
+from models.charger import Charger
+from .conftest import book
+
+
+def test_booking_confirms_charger_written_by_another_process(app, client):
+    with app.app_context():
+        db.session.add(Charger(location_id=1, status="available"))
+        db.session.commit()
+        database = db.engine.url.database
+
+    # Carrega os carregadores do Shopping Center no índice deste processo
+    assert book(client, "2032-05-01T08:00", "2032-05-01T09:00").status_code == 201
+
+    # Outro worker grava no carregador 1 sem passar pelo índice deste processo
+    with sqlite3.connect(database) as conn:
+        conn.execute(
+            "INSERT INTO appointment (user_id, charger_id, start_time, end_time, status) "
+            "VALUES (1, 1, '2032-05-01 10:00:00.000000', '2032-05-01 11:00:00.000000', 'confirmed')"
+        )
+    conn.close()
+
+    response = book(client, "2032-05-01T10:00", "2032-05-01T11:00")
+    assert response.status_code == 201
+    assert response.get_json()["appointment"]["charger_id"] == 9
+
+    assert book(client, "2032-05-01T10:30", "2032-05-01T11:30").status_code == 409
+
+
+def test_archived_and_deleted_ids_are_not_reused(app, client):
+    for day in (1, 2, 3):
+        assert book(client, f"2020-01-0{day}T10:00", f"2020-01-0{day}T11:00").status_code == 201
+    last = book(client, "2032-05-01T10:00", "2032-05-01T11:00").get_json()["appointment"]["id"]
+    with app.app_context():
+        Appointment.query.filter(Appointment.id < last).update({"status": "done"})
+        db.session.commit()
+        assert archive_appointments(older_than_days=30) == 3
+
+    assert client.delete(f"/api/appointments/{last}").status_code == 200
+    booked = [book(client, "2020-02-01T10:00", "2020-02-01T11:00").get_json()["appointment"]["id"]]
+    booked.append(book(client, "2032-06-01T10:00", "2032-06-01T11:00").get_json()["appointment"]["id"])
+    assert min(booked) > last
+
+    with app.app_context():
+        Appointment.query.filter_by(id=booked[0]).update({"status": "done"})
+        db.session.commit()
+        assert archive_appointments(older_than_days=30) == 1
+
+    response = client.get("/api/appointments/1", query_string={"include_history": 1})
+    ids = [appointment["id"] for appointment in response.get_json()]
+    assert sorted(ids) == [1, 2, 3, *booked]
+
+
+def test_failed_booking_releases_reservation(client, monkeypatch):
+    def locked(*args, **kwargs):
+        raise OperationalError("INSERT INTO charger_usage_hourly", {}, Exception("database is locked"))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(appointment_routes, "record_usage", locked)
+        assert book(client, "2032-05-01T10:00", "2032-05-01T11:00").status_code == 500
+
+    assert book(client, "2032-05-01T10:00", "2032-05-01T11:00").status_code == 201
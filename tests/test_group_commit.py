@@ -0,0 +1,25 @@
+from models import db
+from models.location import Location
+from utils.group_commit import GroupCommitWriter
+
+
+def test_failed_job_is_rolled_back_alone(app):
+    writer = GroupCommitWriter(app, max_batch=2, max_wait=1)
+
+    def add_location(name, fail):
+        location = Location(name=name, address="Rua A, 1")
+        db.session.add(location)
+        db.session.flush()
+        if fail:
+            raise ValueError(name)
+        return location
+
+    ok = writer.submit(add_location, "Posto A", False, after_commit=lambda location: location.id)
+    failed = writer.submit(add_location, "Posto B", True)
+
+    assert ok.result(timeout=5) is not None
+    assert isinstance(failed.exception(timeout=5), ValueError)
+    with app.app_context():
+        names = {name for (name,) in db.session.query(Location.name)}
+    assert "Posto A" in names
+    assert "Posto B" not in names
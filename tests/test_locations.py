@@ -0,0 +1,27 @@
+import sqlite3
+from models import db
+
+
+def nearby_ids(client, **params):
+    response = client.get("/api/locations/nearby", query_string={"lat": -22.9035, "lon": -43.2096, "k": 10, **params})
+    assert response.status_code == 200
+    return {location["id"] for location in response.get_json()}
+
+
+def test_nearby_sees_writes_from_other_processes(app):
+    client = app.test_client()
+    assert 1 in nearby_ids(client, status="available")
+
+    with app.app_context():
+        database = db.engine.url.database
+    # Escrita fora do ORM deste processo (outro worker, `flask seed`, SQL direto)
+    with sqlite3.connect(database) as conn:
+        conn.execute("UPDATE charger SET status = 'maintenance' WHERE location_id = 1")
+        conn.execute(
+            "INSERT INTO location (name, address, latitude, longitude) "
+            "VALUES ('Posto Novo', 'Rua B, 2', -22.9040, -43.2100)"
+        )
+    conn.close()
+
+    assert 1 not in nearby_ids(client, status="available")
+    assert 9 in nearby_ids(client)
@@ -0,0 +1,41 @@
+from flask import current_app, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+TOKEN_SALT = "chargehub-auth-token"
+
+
+class InvalidToken(Exception):
+    """ Token ausente do formato esperado, com assinatura inválida ou expirado """
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt=TOKEN_SALT)
+
+
+def issue_token(user_id, email):
+    """ Gera um token assinado com a identidade do usuário, válido por AUTH_TOKEN_MAX_AGE """
+    return _serializer().dumps({"uid": user_id, "email": email})
+
+
+def token_identity():
+    """
+    Lê o cabeçalho `Authorization: Bearer <token>` e retorna (user_id, email).
+    Retorna None se a requisição não traz token e lança InvalidToken se ele for
+    inválido ou estiver expirado.
+    """
+    header = request.headers.get("Authorization", "")
+    if not header:
+        return None
+    scheme, _, token = header.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise InvalidToken("Cabeçalho Authorization inválido. Use 'Bearer <token>'")
+    try:
+        data = _serializer().loads(token, max_age=current_app.config["AUTH_TOKEN_MAX_AGE"])
+    except BadSignature:
+        raise InvalidToken("Token inválido ou expirado")
+    return data["uid"], data["email"]
+
+
+def needs_rehash(password_hash):
+    """ Indica se o hash foi gerado com parâmetros diferentes de PASSWORD_HASH_METHOD """
+    return password_hash.split("$", 1)[0] != current_app.config["PASSWORD_HASH_METHOD"]
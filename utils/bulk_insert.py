@@ -0,0 +1,11 @@
+from sqlalchemy import insert
+
+
+def insert_returning_ids(session, model, rows):
+    """
+    Insere `rows` (lista de dicts) em lote e retorna os ids gerados na mesma
+    ordem das linhas. O SQLite gera os ids em ordem crescente de inserção, mas a
+    ordem das linhas do RETURNING não é garantida: ordenar os ids mantém o
+    INSERT em um único comando sem depender dela.
+    """
+    return sorted(session.scalars(insert(model).returning(model.id), rows))
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request
+from sqlalchemy import event, select
+
+
+class ResponseCache:
+    """
+    Cache local ao processo para respostas de listagens já serializadas.
+
+    A geração de uma resposta é a tupla das versões, no banco, das tabelas das
+    quais ela depende (tabela `table_version`, incrementada por triggers em
+    cada escrita). Como a versão vem do banco, escritas feitas por outros
+    workers ou pelo CLI também invalidam as entradas e as ETags deste processo.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, *tables):
+        """ Versões atuais das tabelas informadas, lidas do banco (uma consulta pela chave primária) """
+        from models import db
+        from models.table_version import TableVersion
+
+        versions = dict(db.session.execute(
+            select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(tables))
+        ).all())
+        return tuple(versions.get(table, 0) for table in tables)
+
+    @staticmethod
+    def etag(generation):
+        """ ETag forte derivada de uma geração lida com `generation` """
+        return "-".join(str(version) for version in generation)
+
+    def get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, key, generation, value):
+        """
+        Armazena `value` para `key`. `generation` deve ser lida antes da consulta
+        ao banco: uma escrita no meio do caminho muda a versão e a entrada
+        simplesmente não é reaproveitada.
+        """
+        with self._lock:
+            self._entries[key] = (generation, value)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class TTLCache:
+    """
+    Cache LRU limitado a `maxsize` entradas, cada uma válida por `ttl` segundos.
+    Usado para chaves naturais praticamente imutáveis (email, nome do local).
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache()
+
+# email -> id do usuário
+user_ids_by_email = TTLCache(maxsize=10000, ttl=300)
+# nome do local -> (id do local, ids dos carregadores em ordem)
+locations_by_name = TTLCache(maxsize=2000, ttl=300)
+
+
+def _register_delete_hooks():
+    """ Exclusões pelo ORM, inclusive em cascata, invalidam os caches de identidade """
+    from models.user import User
+    from models.location import Location
+    from models.charger import Charger
+
+    event.listen(User, "after_delete", lambda mapper, conn, user: user_ids_by_email.invalidate(user.email))
+    event.listen(Location, "after_delete", lambda mapper, conn, location: locations_by_name.invalidate(location.name))
+    event.listen(Charger, "after_delete", lambda mapper, conn, charger: locations_by_name.clear())
+
+_register_delete_hooks()
+
+
+def not_modified(etag):
+    """ Retorna uma resposta 304 se o If-None-Match da requisição já contém `etag` """
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    return None
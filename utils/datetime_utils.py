@@ -1,11 +1,21 @@
 from datetime import datetime
 
+def _naive(value):
+    """
+    Datas com fuso (ex.: "2030-01-02T10:00Z") são convertidas para o horário
+    local do servidor sem fuso, o mesmo referencial das datas gravadas no banco
+    e de datetime.now() usado nas comparações.
+    """
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
 def parse_iso_datetime(date_str):
     try:
-        return datetime.fromisoformat(date_str)
+        return _naive(datetime.fromisoformat(date_str))
     except ValueError:
         pass
     try:
         return datetime.strptime(date_str, "%Y-%m-%dT%H:%M")
     except ValueError:
-        raise ValueError("Formato de data inválido. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS ou YYYY-MM-DDTHH:MM)")
\ No newline at end of file
+        raise ValueError("Formato de data inválido. Use ISO 8601 (YYYY-MM-DDTHH:MM:SS ou YYYY-MM-DDTHH:MM)")
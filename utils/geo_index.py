@@ -0,0 +1,159 @@
+import heapq
+import math
+import threading
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """ Distância em km entre dois pontos (graus) sobre a superfície da Terra """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class _GeoLocation:
+    __slots__ = ("id", "name", "address", "lat", "lon", "cell", "chargers")
+
+    def __init__(self, location_id, name, address, lat, lon, cell):
+        self.id = location_id
+        self.name = name
+        self.address = address
+        self.lat = lat
+        self.lon = lon
+        self.cell = cell
+        # id do carregador -> status
+        self.chargers = {}
+
+
+class GeoGridIndex:
+    """
+    Índice espacial em grade para localizações com latitude/longitude.
+
+    Cada localização fica em uma célula de `cell_size` graus. A busca dos k mais
+    próximos percorre anéis de células ao redor do ponto consultado e para
+    assim que nenhuma célula restante pode conter algo mais próximo que o
+    k-ésimo resultado (ou fora do raio). O índice guarda a geração das tabelas
+    location e charger (ver models/table_version.py) com que foi carregado e é
+    recarregado quando ela muda, inclusive por escritas de outros workers, de
+    `flask seed` ou de SQL direto.
+    """
+
+    def __init__(self, cell_size=0.05):
+        self.cell_size = cell_size
+        self._locations = {}
+        self._cells = {}
+        self._generation = None
+        self._lock = threading.RLock()
+
+    @property
+    def _lon_cells(self):
+        return math.ceil(360 / self.cell_size)
+
+    def _cell(self, lat, lon):
+        # A longitude dá a volta no antimeridiano: -180 e 180 caem na mesma coluna
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size) % self._lon_cells)
+
+    def _ensure_loaded(self):
+        from models import db
+        from models.location import Location
+        from models.charger import Charger
+        from utils.cache import response_cache
+
+        generation = response_cache.generation("location", "charger")
+        if generation == self._generation:
+            return
+
+        self._locations.clear()
+        self._cells.clear()
+        for location_id, name, address, lat, lon in db.session.query(
+                Location.id, Location.name, Location.address, Location.latitude, Location.longitude
+        ).filter(Location.latitude.isnot(None), Location.longitude.isnot(None)):
+            self._add(location_id, name, address, lat, lon)
+        for charger_id, location_id, status in db.session.query(Charger.id, Charger.location_id, Charger.status):
+            location = self._locations.get(location_id)
+            if location is not None:
+                location.chargers[charger_id] = status
+        self._generation = generation
+
+    def _add(self, location_id, name, address, lat, lon):
+        cell = self._cell(lat, lon)
+        location = _GeoLocation(location_id, name, address, lat, lon, cell)
+        self._locations[location_id] = location
+        self._cells.setdefault(cell, set()).add(location_id)
+        return location
+
+    def invalidate(self):
+        with self._lock:
+            self._generation = None
+
+    def nearest(self, lat, lon, radius_km, k, status=None):
+        """
+        Retorna até `k` tuplas (distância em km, localização, carregadores no
+        status pedido) em ordem de distância, dentro de `radius_km`. Com `status`,
+        considera apenas localizações com ao menos um carregador nesse status.
+        """
+        with self._lock:
+            self._ensure_loaded()
+
+            # Menor largura de célula em km dentro do raio (longitude encolhe com a latitude)
+            farthest_lat = min(abs(lat) + radius_km / KM_PER_DEGREE + self.cell_size, 90.0)
+            cos_lat = max(math.cos(math.radians(farthest_lat)), 1e-6)
+            cell_km = self.cell_size * KM_PER_DEGREE * cos_lat
+            max_ring = int(radius_km / cell_km) + 1
+            ci, cj = self._cell(lat, lon)
+
+            best = []  # heap de (-distância, id, localização, quantidade)
+
+            def consider(location):
+                if status is None:
+                    matching = len(location.chargers)
+                else:
+                    matching = sum(1 for st in location.chargers.values() if st == status)
+                    if not matching:
+                        return
+                distance = haversine_km(lat, lon, location.lat, location.lon)
+                if distance > radius_km:
+                    return
+                item = (-distance, -location.id, location, matching)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+
+            # Perto dos polos (ou com raios enormes) os anéis cobririam mais células
+            # do que há localizações, ou dariam a volta na longitude: percorrer
+            # todas as localizações é mais barato e limita o tempo sob o lock
+            if 2 * max_ring + 1 > self._lon_cells or (2 * max_ring + 1) ** 2 > len(self._locations):
+                for location in self._locations.values():
+                    consider(location)
+            else:
+                lon_cells = self._lon_cells
+                for ring in range(max_ring + 1):
+                    # Qualquer célula do anel está a pelo menos (ring - 1) células do ponto
+                    if len(best) == k and (ring - 1) * cell_km > -best[0][0]:
+                        break
+                    for i, j in self._ring_cells(ci, cj, ring):
+                        for location_id in self._cells.get((i, j % lon_cells), ()):
+                            consider(self._locations[location_id])
+
+            return [(-d, location, matching) for d, _, location, matching in sorted(best, reverse=True)]
+
+    @staticmethod
+    def _ring_cells(ci, cj, ring):
+        if ring == 0:
+            yield (ci, cj)
+            return
+        for dj in range(-ring, ring + 1):
+            yield (ci - ring, cj + dj)
+            yield (ci + ring, cj + dj)
+        for di in range(-ring + 1, ring):
+            yield (ci + di, cj - ring)
+            yield (ci + di, cj + ring)
+
+
+location_geo_index = GeoGridIndex()
+
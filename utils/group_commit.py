@@ -0,0 +1,145 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _WriteJob:
+    __slots__ = ("work", "args", "after_commit", "after_rollback", "future")
+
+    def __init__(self, work, args, after_commit, after_rollback):
+        self.work = work
+        self.args = args
+        self.after_commit = after_commit
+        self.after_rollback = after_rollback
+        self.future = Future()
+
+
+class GroupCommitWriter:
+    """
+    Thread escritora dedicada que agrupa várias escritas em um único commit.
+
+    `submit` enfileira uma função que adiciona objetos à sessão sem fazer commit
+    e devolve um Future. A thread junta até `max_batch` trabalhos ou espera no
+    máximo `max_wait` segundos, faz um commit para o grupo inteiro e então
+    resolve cada Future com o retorno de `after_commit` (ou da própria função).
+    O grupo toma o lock de escrita (BEGIN IMMEDIATE) antes do primeiro trabalho
+    e cada trabalho roda em um savepoint, desfeito se ele lançar exceção.
+    Se o commit do grupo falhar, cada trabalho é refeito e gravado sozinho, para
+    que o erro chegue apenas à requisição que o causou. Um Future cancelado
+    enquanto o trabalho ainda estava na fila é descartado sem ser executado.
+    """
+
+    def __init__(self, app, max_batch=32, max_wait=0.005):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, work, *args, after_commit=None, after_rollback=None):
+        job = _WriteJob(work, args, after_commit, after_rollback)
+        self._queue.put(job)
+        return job.future
+
+    def _run(self):
+        from models import db
+
+        with self.app.app_context():
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.max_wait
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+
+                try:
+                    self._commit_group(db, batch)
+                finally:
+                    db.session.remove()
+
+    def _commit_group(self, db, batch):
+        from models.locking import begin_immediate
+
+        jobs = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        try:
+            begin_immediate(db.session)
+        except Exception as e:
+            db.session.rollback()
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+
+        pending = []
+        for job in jobs:
+            value = None
+            try:
+                # Cada trabalho em um savepoint: se falhar, o que ele já
+                # adicionou à sessão não é gravado com o resto do grupo
+                with db.session.begin_nested():
+                    value = job.work(*job.args)
+            except Exception as e:
+                self._rolled_back(job, value)
+                job.future.set_exception(e)
+                continue
+            pending.append((job, value))
+
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for job, value in pending:
+                self._rolled_back(job, value)
+            if len(pending) == 1:
+                pending[0][0].future.set_exception(e)
+            else:
+                for job, _ in pending:
+                    self._commit_alone(db, job)
+            return
+
+        for job, value in pending:
+            self._committed(job, value)
+
+    def _commit_alone(self, db, job):
+        from models.locking import begin_immediate
+
+        value = None
+        try:
+            begin_immediate(db.session)
+            value = job.work(*job.args)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self._rolled_back(job, value)
+            job.future.set_exception(e)
+            return
+        self._committed(job, value)
+
+    def _committed(self, job, value):
+        try:
+            if value is not None and job.after_commit:
+                value = job.after_commit(value)
+            job.future.set_result(value)
+        except Exception as e:
+            job.future.set_exception(e)
+
+    def _rolled_back(self, job, value):
+        if value is not None and job.after_rollback:
+            job.after_rollback(value)
+
+
+_writers_lock = threading.Lock()
+
+def get_writer(app, name, max_batch, max_wait):
+    """ Retorna (criando na primeira chamada) o escritor `name` associado ao app """
+    writers = app.extensions.setdefault("group_commit_writers", {})
+    with _writers_lock:
+        if name not in writers:
+            writers[name] = GroupCommitWriter(app, max_batch=max_batch, max_wait=max_wait)
+        return writers[name]
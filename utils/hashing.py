@@ -0,0 +1,107 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingOverloaded(Exception):
+    """ A fila de hashes de senha está cheia; a requisição deve ser recusada com 503 """
+
+    def __init__(self, retry_after):
+        super().__init__("Servidor ocupado processando senhas, tente novamente em instantes")
+        self.retry_after = retry_after
+
+
+class HashingUnavailable(HashingOverloaded):
+    """ O hash não terminou dentro do timeout ou o pool de processos falhou; também vira 503 """
+
+    def __init__(self, retry_after):
+        super().__init__(retry_after)
+        self.args = ("Serviço de senhas indisponível no momento, tente novamente em instantes",)
+
+
+class PasswordHasher:
+    """
+    Executa o hash e a verificação de senhas em um pool de processos limitado.
+
+    No máximo `max_pending` operações podem estar em execução ou na fila; além
+    disso, `HashingOverloaded` é lançada imediatamente em vez de enfileirar, para
+    que um pico de cadastros e logins não segure as threads que atendem as
+    rotas de leitura. Com `workers=0` o hash roda na própria thread da requisição.
+    A vaga só é devolvida quando o processo termina a operação, mesmo que a
+    requisição já tenha desistido por timeout. Timeout e falha do pool lançam
+    `HashingUnavailable`; um pool quebrado é recriado na operação seguinte.
+    """
+
+    def __init__(self, workers, max_pending, timeout, retry_after):
+        self.workers = workers
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn evita herdar, via fork, locks das threads do servidor
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _discard(self, pool):
+        """ Descarta um pool quebrado para que o próximo _executor crie outro """
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded(self.retry_after)
+        pool = self._executor()
+        try:
+            future = pool.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._slots.release()
+            self._discard(pool)
+            raise HashingUnavailable(self.retry_after)
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Ainda na fila: cancela e libera a vaga já; em execução, a vaga volta ao terminar
+            future.cancel()
+            raise HashingUnavailable(self.retry_after)
+        except BrokenProcessPool:
+            self._discard(pool)
+            raise HashingUnavailable(self.retry_after)
+
+    def hash(self, password, method):
+        return self._run(generate_password_hash, password, method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+
+_hashers_lock = threading.Lock()
+
+def get_hasher():
+    """ Retorna (criando na primeira chamada) o PasswordHasher do app atual """
+    app = current_app._get_current_object()
+    with _hashers_lock:
+        if "password_hasher" not in app.extensions:
+            app.extensions["password_hasher"] = PasswordHasher(
+                workers=app.config["PASSWORD_HASH_WORKERS"],
+                max_pending=app.config["PASSWORD_HASH_MAX_PENDING"],
+                timeout=app.config["PASSWORD_HASH_TIMEOUT"],
+                retry_after=app.config["PASSWORD_HASH_RETRY_AFTER"],
+            )
+        return app.extensions["password_hasher"]
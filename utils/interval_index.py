@@ -0,0 +1,163 @@
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+
+class _ChargerIntervals:
+    """ Intervalos ocupados de um carregador, ordenados pelo início """
+
+    __slots__ = ("starts", "entries", "max_length")
+
+    def __init__(self):
+        self.starts = []
+        self.entries = []
+        # Maior duração já vista: limita a varredura para trás na checagem de
+        # sobreposição mesmo que existam intervalos sobrepostos legados no banco
+        self.max_length = timedelta(0)
+
+    def add(self, start, end, appointment_id):
+        pos = bisect_right(self.starts, start)
+        self.starts.insert(pos, start)
+        self.entries.insert(pos, (start, end, appointment_id))
+        if end - start > self.max_length:
+            self.max_length = end - start
+
+    def overlaps(self, start, end):
+        # Apenas intervalos que começam antes de `end` podem sobrepor
+        pos = bisect_left(self.starts, end) - 1
+        limit = start - self.max_length
+        while pos >= 0 and self.entries[pos][0] > limit:
+            if self.entries[pos][1] > start:
+                return True
+            pos -= 1
+        return False
+
+    def find(self, start, appointment_id):
+        pos = bisect_left(self.starts, start)
+        while pos < len(self.starts) and self.starts[pos] == start:
+            if self.entries[pos][2] == appointment_id:
+                return pos
+            pos += 1
+        return None
+
+    def remove(self, start, appointment_id):
+        pos = self.find(start, appointment_id)
+        if pos is not None:
+            del self.starts[pos]
+            del self.entries[pos]
+
+    def assign(self, start, appointment_id):
+        pos = self.find(start, None)
+        if pos is not None:
+            s, e, _ = self.entries[pos]
+            self.entries[pos] = (s, e, appointment_id)
+
+    def window(self, start, end):
+        """ Retorna os intervalos que cruzam [start, end) em ordem de início """
+        pos = bisect_left(self.starts, start - self.max_length)
+        result = []
+        while pos < len(self.entries) and self.entries[pos][0] < end:
+            entry = self.entries[pos]
+            if entry[1] > start:
+                result.append(entry)
+            pos += 1
+        return result
+
+
+class ChargerIntervalIndex:
+    """
+    Índice em memória dos horários ocupados de cada carregador.
+
+    Os intervalos de um carregador são carregados sob demanda a partir da tabela
+    `appointment` na primeira vez em que ele é consultado e, depois disso, mantidos
+    pelas rotas de criação e exclusão de agendamentos. Agendamentos cancelados não
+    ocupam horário. O índice é local ao processo e não vê o que outros workers
+    gravam: ele apenas escolhe o carregador candidato, que a rota confirma no
+    banco dentro da transação de escrita, chamando `invalidate` se ele estiver
+    desatualizado.
+    """
+
+    def __init__(self):
+        self._chargers = {}
+        self._lock = threading.RLock()
+
+    def load_many(self, charger_ids):
+        """ Carrega em uma única consulta os carregadores ainda não indexados """
+        from models import db
+        from models.appointment import Appointment
+
+        with self._lock:
+            missing = [cid for cid in charger_ids if cid not in self._chargers]
+            if not missing:
+                return
+
+            rows = db.session.query(
+                Appointment.charger_id,
+                Appointment.start_time,
+                Appointment.end_time,
+                Appointment.id,
+            ).filter(
+                Appointment.charger_id.in_(missing),
+                Appointment.status != "canceled",
+            ).all()
+
+            loaded = {cid: _ChargerIntervals() for cid in missing}
+            for charger_id, start, end, appointment_id in rows:
+                loaded[charger_id].add(start, end, appointment_id)
+            self._chargers.update(loaded)
+
+    def _get(self, charger_id):
+        intervals = self._chargers.get(charger_id)
+        if intervals is None:
+            self.load_many([charger_id])
+            intervals = self._chargers[charger_id]
+        return intervals
+
+    def is_free(self, charger_id, start, end):
+        with self._lock:
+            return not self._get(charger_id).overlaps(start, end)
+
+    def reserve(self, charger_ids, start, end):
+        """
+        Reserva [start, end) no primeiro carregador livre da lista, na ordem dada.
+        Retorna o id do carregador reservado ou None se todos estiverem ocupados.
+        A reserva fica pendente até `assign` (após o commit) ou `release`.
+        """
+        with self._lock:
+            self.load_many(charger_ids)
+            for charger_id in charger_ids:
+                intervals = self._chargers[charger_id]
+                if not intervals.overlaps(start, end):
+                    intervals.add(start, end, None)
+                    return charger_id
+            return None
+
+    def assign(self, charger_id, start, appointment_id):
+        """ Associa o id do agendamento gravado a uma reserva pendente """
+        with self._lock:
+            intervals = self._chargers.get(charger_id)
+            if intervals is not None:
+                intervals.assign(start, appointment_id)
+
+    def release(self, charger_id, start, appointment_id=None):
+        """ Remove uma reserva pendente ou um agendamento excluído """
+        with self._lock:
+            intervals = self._chargers.get(charger_id)
+            if intervals is not None:
+                intervals.remove(start, appointment_id)
+
+    def busy(self, charger_id, start, end):
+        """ Lista os intervalos (início, fim, id) que cruzam [start, end) """
+        with self._lock:
+            return self._get(charger_id).window(start, end)
+
+    def invalidate(self, charger_id=None):
+        """ Descarta um carregador (ou todos) para recarregar do banco """
+        with self._lock:
+            if charger_id is None:
+                self._chargers.clear()
+            else:
+                self._chargers.pop(charger_id, None)
+
+
+appointment_index = ChargerIntervalIndex()
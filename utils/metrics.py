@@ -0,0 +1,211 @@
+import bisect
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Limites (em segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Series:
+    __slots__ = ("buckets", "count", "total", "db_time", "statements", "rows")
+
+    def __init__(self, size):
+        self.buckets = [0] * size
+        self.count = 0
+        self.total = 0.0
+        self.db_time = 0.0
+        self.statements = 0
+        self.rows = 0
+
+
+class RequestMetrics:
+    """
+    Agrega, por (rota, método, status), o histograma de latência e os totais de
+    tempo de banco, comandos SQL e linhas gravadas. Cada requisição faz uma
+    única atualização sob o lock; a conversão para o formato do Prometheus só
+    acontece quando /metrics é consultado.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.bucket_bounds = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, method, status, duration, db_time, statements, rows):
+        index = bisect.bisect_left(self.bucket_bounds, duration)
+        key = (endpoint, method, status)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.bucket_bounds) + 1)
+            series.buckets[index] += 1
+            series.count += 1
+            series.total += duration
+            series.db_time += db_time
+            series.statements += statements
+            series.rows += rows
+
+    def snapshot(self):
+        with self._lock:
+            return [(key, list(s.buckets), s.count, s.total, s.db_time, s.statements, s.rows)
+                    for key, s in self._series.items()]
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+class JobMetrics:
+    """ Totais de execuções, linhas processadas e duração por job em segundo plano """
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def observe(self, job, rows, duration):
+        with self._lock:
+            totals = self._jobs.setdefault(job, [0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += rows
+            totals[2] += duration
+
+    def snapshot(self):
+        with self._lock:
+            return {job: tuple(totals) for job, totals in self._jobs.items()}
+
+    def clear(self):
+        with self._lock:
+            self._jobs.clear()
+
+
+job_metrics = JobMetrics()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{_label(value)}"' for name, value in labels.items()) + "}"
+
+
+def render_prometheus(caches):
+    """
+    Gera o texto de exposição do Prometheus com as métricas de requisições e
+    as estatísticas dos caches em `caches` (nome -> objeto com `stats()`)
+    """
+    lines = [
+        "# HELP chargehub_http_request_duration_seconds Latência das requisições por rota",
+        "# TYPE chargehub_http_request_duration_seconds histogram",
+    ]
+    snapshot = sorted(request_metrics.snapshot())
+    bounds = [*(f"{b:g}" for b in request_metrics.bucket_bounds), "+Inf"]
+    for (endpoint, method, status), buckets, count, total, _, _, _ in snapshot:
+        cumulative = 0
+        for bound, n in zip(bounds, buckets):
+            cumulative += n
+            labels = _labels(endpoint=endpoint, method=method, status=status, le=bound)
+            lines.append(f"chargehub_http_request_duration_seconds_bucket{labels} {cumulative}")
+        labels = _labels(endpoint=endpoint, method=method, status=status)
+        lines.append(f"chargehub_http_request_duration_seconds_sum{labels} {total:.6f}")
+        lines.append(f"chargehub_http_request_duration_seconds_count{labels} {count}")
+
+    for name, help_text, position, fmt in (
+        ("chargehub_db_time_seconds_total", "Tempo gasto em comandos SQL", 4, "{:.6f}"),
+        ("chargehub_db_statements_total", "Comandos SQL executados", 5, "{}"),
+        ("chargehub_db_rows_written_total", "Linhas inseridas, alteradas ou removidas", 6, "{}"),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for item in snapshot:
+            endpoint, method, status = item[0]
+            labels = _labels(endpoint=endpoint, method=method, status=status)
+            lines.append(f"{name}{labels} {fmt.format(item[position])}")
+
+    jobs = sorted(job_metrics.snapshot().items())
+    for name, help_text, position, fmt in (
+        ("chargehub_job_runs_total", "Execuções dos jobs em segundo plano", 0, "{}"),
+        ("chargehub_job_rows_total", "Linhas alteradas pelos jobs em segundo plano", 1, "{}"),
+        ("chargehub_job_duration_seconds_total", "Tempo gasto pelos jobs em segundo plano", 2, "{:.6f}"),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for job, totals in jobs:
+            lines.append(f"{name}{_labels(job=job)} {fmt.format(totals[position])}")
+
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    for name, help_text, kind, value in (
+        ("chargehub_cache_hits_total", "Acertos do cache", "counter", lambda s: s["hits"]),
+        ("chargehub_cache_misses_total", "Erros do cache", "counter", lambda s: s["misses"]),
+        ("chargehub_cache_entries", "Entradas armazenadas no cache", "gauge", lambda s: s["entries"]),
+        ("chargehub_cache_hit_ratio", "Fração de acertos desde o início do processo", "gauge",
+         lambda s: round(s["hits"] / (s["hits"] + s["misses"]), 6) if s["hits"] + s["misses"] else 0),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for cache_name, cache_stats in stats.items():
+            lines.append(f"{name}{_labels(cache=cache_name)} {value(cache_stats)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def init_metrics(app):
+    """
+    Registra os hooks de instrumentação no app e no engine de `models.db`.
+    Cada requisição ganha o cabeçalho Server-Timing (se METRICS_SERVER_TIMING)
+    e alimenta `request_metrics`.
+    """
+    from models import db
+
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    with app.app_context():
+        engine = db.engine
+    server_timing = app.config.get("METRICS_SERVER_TIMING", True)
+
+    @app.before_request
+    def _start_request_metrics():
+        # [início, tempo de banco, comandos SQL, linhas gravadas]
+        g._metrics = [time.perf_counter(), 0.0, 0, 0]
+
+    @app.after_request
+    def _finish_request_metrics(response):
+        state = g.pop("_metrics", None)
+        if state is None:
+            return response
+        duration = time.perf_counter() - state[0]
+        rule = request.url_rule
+        request_metrics.observe(
+            rule.rule if rule is not None else "unmatched", request.method, response.status_code,
+            duration, state[1], state[2], state[3],
+        )
+        if server_timing:
+            response.headers["Server-Timing"] = (
+                f"app;dur={duration * 1000:.2f}, db;dur={state[1] * 1000:.2f}, "
+                f'sql;desc="statements={state[2]} rows={state[3]}"'
+            )
+        return response
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_statement(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish_statement(conn, cursor, statement, parameters, context, executemany):
+        # Comandos fora de uma requisição (threads de gravação, jobs) não são atribuídos a rotas
+        if context is None or not has_request_context():
+            return
+        state = g.get("_metrics")
+        if state is None:
+            return
+        state[1] += time.perf_counter() - context._metrics_started
+        state[2] += 1
+        # O sqlite3 só informa rowcount para INSERT/UPDATE/DELETE (-1 em SELECT)
+        if cursor.rowcount > 0:
+            state[3] += cursor.rowcount
@@ -0,0 +1,31 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values):
+    """ Gera um cursor opaco a partir da chave de ordenação do último item """
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """ Decodifica um cursor gerado por `encode_cursor` (lança ValueError se inválido) """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor de paginação inválido")
+    if not isinstance(values, list):
+        raise ValueError("Cursor de paginação inválido")
+    return values
+
+
+def parse_limit(value, default, maximum):
+    """ Converte o parâmetro `limit` respeitando o máximo permitido """
+    if value is None or value == "":
+        return default
+    limit = int(value)
+    if limit < 1 or limit > maximum:
+        raise ValueError(f"O parâmetro limit deve estar entre 1 e {maximum}")
+    return limit
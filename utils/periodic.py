@@ -0,0 +1,67 @@
+import logging
+import threading
+
+logger = logging.getLogger("chargehub.jobs")
+_start_lock = threading.Lock()
+
+
+class PeriodicTask:
+    """
+    Executa `fn()` a cada `interval` segundos em uma thread daemon, dentro de um
+    app context e com a sessão do banco encerrada ao fim de cada execução.
+    Uma falha é registrada no log e não interrompe as execuções seguintes.
+    """
+
+    def __init__(self, app, name, interval, fn):
+        self.app = app
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        from models import db
+
+        while not self._stop.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    self.fn()
+                except Exception:
+                    logger.exception("Falha na execução do job %s", self.name)
+                finally:
+                    db.session.remove()
+
+
+def start_periodic(app, name, interval, fn):
+    """ Inicia (uma vez por app) a tarefa periódica `name`; interval <= 0 não inicia """
+    if interval <= 0:
+        return None
+    tasks = app.extensions.setdefault("periodic_tasks", {})
+    if name not in tasks:
+        tasks[name] = PeriodicTask(app, name, interval, fn).start()
+    return tasks[name]
+
+
+def start_periodic_when_serving(app, name, interval, fn):
+    """
+    Agenda a tarefa `name` para iniciar na primeira requisição atendida pelo
+    processo. Assim ela roda só nos processos que servem a API (python app.py,
+    flask run, gunicorn) e não em comandos do CLI como `flask seed`.
+    """
+    if interval <= 0:
+        return
+
+    @app.before_request
+    def _start_periodic_task():
+        if name not in app.extensions.get("periodic_tasks", ()):
+            with _start_lock:
+                start_periodic(app, name, interval, fn)
@@ -0,0 +1,57 @@
+import queue
+import threading
+
+
+class Subscription:
+    """ Fila de um assinante; `lagged` indica que mensagens foram descartadas """
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize)
+        self.lagged = False
+
+    def get(self, timeout=None):
+        return self.queue.get(timeout=timeout)
+
+
+class Broker:
+    """
+    Distribuição em memória (fan-out) de mensagens para os assinantes do processo.
+
+    `publish` apenas coloca a mensagem na fila de cada assinante, sem bloquear.
+    Um assinante lento cuja fila enche é marcado como `lagged` e deixa de receber
+    mensagens; cabe a ele encerrar e se inscrever de novo para obter um novo estado.
+    """
+
+    def __init__(self, max_queue=1000):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscription = Subscription(self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.lagged:
+                continue
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                subscription.lagged = True
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+charger_events = Broker()
@@ -0,0 +1,125 @@
+import logging
+import re
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger("chargehub.queries")
+slow_query_logger = logging.getLogger("chargehub.slow_queries")
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+class RepeatedQueryError(Exception):
+    """ Uma mesma forma de SQL foi executada mais vezes que o limite em uma requisição """
+
+
+def fingerprint(statement):
+    """
+    Normaliza o SQL para agrupar comandos de mesma forma: literais viram `?`,
+    listas de IN de qualquer tamanho viram `(?)` e espaços são colapsados
+    """
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _IN_LIST.sub("(?)", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+
+def _route():
+    if not has_request_context():
+        return "-"
+    rule = request.url_rule
+    return f"{request.method} {rule.rule if rule is not None else request.path}"
+
+
+def _explain(conn, statement, parameters, executemany):
+    """ EXPLAIN QUERY PLAN direto no cursor DBAPI, sem disparar os eventos do engine """
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        rows = cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+    except Exception as e:
+        return [f"(plano indisponível: {e})"]
+    finally:
+        cursor.close()
+    # Linhas no formato (id, pai, -, detalhe); a profundidade vem da cadeia de pais
+    depth = {0: -1}
+    plan = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        plan.append("  " * depth[node_id] + detail)
+    return plan
+
+
+def init_query_inspector(app):
+    """
+    Modo opcional (QUERY_INSPECTION) de inspeção do SQL de cada requisição:
+    avisa quando a mesma forma de comando roda mais de QUERY_REPEAT_THRESHOLD
+    vezes (padrão N+1), lançando RepeatedQueryError se QUERY_REPEAT_RAISE, e
+    registra em `chargehub.slow_queries` os comandos acima de SLOW_QUERY_MS com
+    a rota e o EXPLAIN QUERY PLAN.
+    """
+    from models import db
+
+    if not app.config.get("QUERY_INSPECTION"):
+        return
+    with app.app_context():
+        engine = db.engine
+    threshold = app.config.get("QUERY_REPEAT_THRESHOLD", 10)
+    raise_on_repeat = app.config.get("QUERY_REPEAT_RAISE", False)
+    slow_ms = app.config.get("SLOW_QUERY_MS")
+    explain = engine.dialect.name == "sqlite"
+
+    log_file = app.config.get("SLOW_QUERY_LOG")
+    if log_file and not any(getattr(h, "baseFilename", None) == log_file for h in slow_query_logger.handlers):
+        handler = logging.FileHandler(log_file, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.setLevel(logging.INFO)
+
+    @app.before_request
+    def _start_query_inspection():
+        g._query_shapes = Counter()
+
+    @app.after_request
+    def _finish_query_inspection(response):
+        shapes = g.pop("_query_shapes", None)
+        if not shapes:
+            return response
+        repeated = [(shape, count) for shape, count in shapes.items() if count > threshold]
+        for shape, count in repeated:
+            logger.warning("%s executou %d vezes o mesmo comando: %s", _route(), count, shape)
+        if repeated and raise_on_repeat:
+            shape, count = max(repeated, key=lambda item: item[1])
+            raise RepeatedQueryError(f"{_route()} executou {count} vezes o mesmo comando: {shape}")
+        return response
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_statement(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._inspector_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish_statement(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            shapes = g.get("_query_shapes")
+            if shapes is not None:
+                shapes[fingerprint(statement)] += 1
+
+        if slow_ms is None or context is None:
+            return
+        elapsed_ms = (time.perf_counter() - context._inspector_started) * 1000
+        if elapsed_ms < slow_ms:
+            return
+        explainable = explain and statement.lstrip()[:6].upper().startswith(_EXPLAINABLE)
+        plan = _explain(conn, statement, parameters, executemany) if explainable else []
+        slow_query_logger.warning(
+            "%.1f ms em %s\n%s%s", elapsed_ms, _route(), statement.strip(),
+            "".join(f"\n    {line}" for line in plan),
+        )
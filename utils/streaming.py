@@ -0,0 +1,37 @@
+import json
+from flask import current_app, request, stream_with_context
+
+# Linhas buscadas por vez no cursor do banco e itens enviados por chunk HTTP
+STREAM_BATCH_SIZE = 1000
+
+
+def wants_stream():
+    """ O cliente pediu a resposta em streaming com ?stream=1 """
+    return request.args.get("stream", "").lower() in ("1", "true")
+
+
+def _json_array(items):
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    buffer = ["["]
+    first = True
+    for item in items:
+        if not first:
+            buffer.append(",")
+        buffer.append(dumps(item))
+        first = False
+        if len(buffer) >= STREAM_BATCH_SIZE * 2:
+            yield "".join(buffer)
+            buffer = []
+    buffer.append("]")
+    yield "".join(buffer)
+
+
+def json_array_response(items):
+    """
+    Envia `items` (um iterável, normalmente lido do banco com yield_per) como um
+    array JSON em chunks, sem materializar a lista inteira na memória.
+    """
+    return current_app.response_class(
+        stream_with_context(_json_array(items)),
+        mimetype="application/json",
+    )